@@ -17,19 +17,24 @@ from pydantic import BaseModel, Field
 
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.init_db import init_db
-from src.database.db_connection import create_session
+from src.database.db_connection import create_session, get_async_sessionmaker, close_async_engine
 
 from src.handlers import variant_sync_handler
 from src.routers.chat_router import router as chat_router
 from src.routers.shape_gen_router import router as shape_gen_router
 from src.routers.virtual_room_router import router as virtual_room_router
+from src.routers.metrics_router import router as metrics_router
 
 from src.handlers.product_sync_handler import product_sync_handler
 from src.handlers.variant_sync_handler import variant_sync_handler
 from src.handlers.promotion_sync_handler import promotion_sync_handler
 from src.handlers.order_sync_handler import order_sync_handler
+from src.handlers.nats_connection import nats_manager
+from src.handlers.jetstream_consumer import jetstream_consumer
+from src.services.embedding_executor import embedding_executor
 
 
 # Set up structured logging following Azure best practices
@@ -121,6 +126,11 @@ async def lifespan(app: FastAPI):
             logger.error("Failed to initialize order sync handler")
             raise RuntimeError("Order sync handler initialization failed")
 
+        # Open the shared NATS connection and subscribe every registered route
+        await nats_manager.connect()
+        # Start durable pull consumers when JetStream mode is enabled
+        await jetstream_consumer.start()
+
         logger.info("Application startup completed successfully")
         yield
         
@@ -135,10 +145,18 @@ async def lifespan(app: FastAPI):
             # Clean up product handler
             if hasattr(app.state, "product_handler"):
                 await app.state.product_handler.shutdown()
+
+            # Drain in-flight sync messages and close the NATS connection
+            await jetstream_consumer.stop()
+            await nats_manager.drain()
                 
             # Close database connections
             if hasattr(app.state, "db"):
                 app.state.db.close()
+            await close_async_engine()
+
+            # Stop the embedding worker pool
+            embedding_executor.shutdown()
                 
             logger.info("Application shutdown completed successfully")
             
@@ -213,9 +231,21 @@ def get_db():
     finally:
         session.close()
 
+async def get_async_db():
+    session_factory = get_async_sessionmaker()
+    if session_factory is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Database connection unavailable"
+        )
+
+    async with session_factory() as session:
+        yield session
+
 app.include_router(chat_router, prefix="/api/chat", tags=["chat"])
 app.include_router(shape_gen_router, prefix="/api", tags=["shape_gen"])
 app.include_router(virtual_room_router, prefix="/api/virtual_room", tags=["virtual_room"])
+app.include_router(metrics_router, prefix="/api/metrics", tags=["metrics"])
 
 
 
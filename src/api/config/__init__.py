@@ -21,7 +21,9 @@ API_CONFIG = {
     "temperature": float(os.environ.get("MODEL_TEMPERATURE", "0.7")),
     "max_tokens": int(os.environ.get("MODEL_MAX_TOKENS", "1024")),
     "top_p": float(os.environ.get("MODEL_TOP_P", "0.95")),
-    "top_k": int(os.environ.get("MODEL_TOP_K", "40"))
+    "top_k": int(os.environ.get("MODEL_TOP_K", "40")),
+    "timeout": float(os.environ.get("MODEL_TIMEOUT", "30")),
+    "max_concurrency": int(os.environ.get("MODEL_MAX_CONCURRENCY", "16"))
 }
 
 # Azure configuration - following Azure best practices
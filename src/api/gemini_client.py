@@ -0,0 +1,176 @@
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import logging
+import os
+import time
+from google import genai
+
+from src.api.config import API_CONFIG
+from src.exceptions.gemini_exceptions import GeminiClientError, GeminiTimeoutError
+from src.monitoring.metrics import LatencyHistogram, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiClient:
+    """Shared async Gemini client used by the chat and virtual room pipelines.
+
+    Calls go through the SDK's async surface so they never block the event loop,
+    are capped by a concurrency semaphore and a per-call timeout, and record
+    latency metrics.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self._api_key = api_key
+        self._client: Optional[genai.Client] = None
+        self.model_id = model_id or API_CONFIG["model_id"]
+        self.timeout = timeout or API_CONFIG["timeout"]
+        self.max_concurrency = max_concurrency or API_CONFIG["max_concurrency"]
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.first_chunk = LatencyHistogram()
+        self.in_flight = 0
+        self.waiting = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.streams = 0
+
+    @property
+    def client(self) -> genai.Client:
+        """Get or create the underlying SDK client"""
+        if self._client is None:
+            self._client = genai.Client(api_key=self._api_key or os.getenv("GEMINI_API_KEY"))
+        return self._client
+
+    async def generate_content(
+        self,
+        contents: Any,
+        config: Optional[Any] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Generate content without blocking the event loop"""
+        model = model or self.model_id
+        timeout = timeout or self.timeout
+
+        started_at = await self._acquire()
+        try:
+            return await asyncio.wait_for(
+                self.client.aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                ),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.error(f"Gemini call to {model} timed out after {timeout}s")
+            raise GeminiTimeoutError(f"Gemini call timed out after {timeout}s")
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Gemini call to {model} failed: {e}")
+            raise GeminiClientError(f"Gemini call failed: {str(e)}") from e
+        finally:
+            self._release(started_at)
+
+    async def stream_content(
+        self,
+        contents: Any,
+        config: Optional[Any] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Any]:
+        """Stream response chunks as they are generated.
+
+        The concurrency slot is held until the stream is exhausted or closed,
+        and timeout bounds the whole stream, not each chunk.
+        """
+        model = model or self.model_id
+        timeout = timeout or self.timeout
+
+        started_at = await self._acquire()
+        deadline = started_at + timeout
+        self.streams += 1
+        stream = None
+        try:
+            stream = await asyncio.wait_for(
+                self.client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                ),
+                timeout=timeout
+            )
+            first = True
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        stream.__anext__(),
+                        timeout=max(deadline - time.perf_counter(), 0)
+                    )
+                except StopAsyncIteration:
+                    break
+                if first:
+                    self.first_chunk.observe((time.perf_counter() - started_at) * 1000)
+                    first = False
+                yield chunk
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.error(f"Gemini stream from {model} timed out after {timeout}s")
+            raise GeminiTimeoutError(f"Gemini stream timed out after {timeout}s")
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Gemini stream from {model} failed: {e}")
+            raise GeminiClientError(f"Gemini stream failed: {str(e)}") from e
+        finally:
+            # Close the HTTP stream when the consumer stops early
+            if stream is not None and hasattr(stream, "aclose"):
+                await stream.aclose()
+            self._release(started_at)
+
+    async def _acquire(self) -> float:
+        """Wait for a concurrency slot; returns when the call started"""
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.queue_wait.observe((started_at - queued_at) * 1000)
+        self.in_flight += 1
+        return started_at
+
+    def _release(self, started_at: float) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+        self.latency.observe((time.perf_counter() - started_at) * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get concurrency, error and latency metrics"""
+        return {
+            "model_id": self.model_id,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "streams": self.streams,
+            "latency": self.latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+            "first_chunk": self.first_chunk.snapshot()
+        }
+
+
+gemini_client = GeminiClient()
+metrics_registry.register("gemini", gemini_client.get_stats)
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import Optional
+import os
+import urllib.parse
+
+from dotenv import load_dotenv
+
+# Defaults below are read at import time, so load .env first
+load_dotenv()
+
+
+@dataclass
+class DatabaseConfig:
+    """Configuration settings for the SQL Server connection"""
+    # Connection settings
+    server: str = os.getenv("SQL_SERVER")
+    database: str = os.getenv("SQL_DATABASE")
+    username: str = os.getenv("SQL_USERNAME")
+    password: str = os.getenv("SQL_PASSWORD")
+    odbc_driver: str = os.getenv("SQL_ODBC_DRIVER", "ODBC Driver 18 for SQL Server")
+    # Full SQLAlchemy URL overriding the SQL Server settings, e.g. sqlite:///./data/local.db
+    url: Optional[str] = os.getenv("SQL_URL")
+    # Full SQLAlchemy URL for the async engine, e.g. sqlite+aiosqlite:///./data/local.db
+    async_url: Optional[str] = os.getenv("SQL_ASYNC_URL")
+
+    # Pool settings
+    pool_size: int = int(os.getenv("SQL_POOL_SIZE", "5"))
+    max_overflow: int = int(os.getenv("SQL_MAX_OVERFLOW", "10"))
+    pool_timeout: float = float(os.getenv("SQL_POOL_TIMEOUT", "30"))
+    # Recycle connections after 30 minutes (Azure best practice)
+    pool_recycle: int = int(os.getenv("SQL_POOL_RECYCLE", "1800"))
+    pool_pre_ping: bool = os.getenv("SQL_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+    # Query settings
+    query_timeout: int = int(os.getenv("SQL_QUERY_TIMEOUT", "30"))
+    echo: bool = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+
+    def get_odbc_url(self, dialect: str = "mssql+pyodbc") -> Optional[str]:
+        """SQL Server URL passing an ODBC connection string to the given dialect.
+
+        The sync (pyodbc) and async (aioodbc) engines both build their URL
+        here, so they always connect to the same server and database.
+        """
+        if not all([self.server, self.database, self.username, self.password]):
+            return None
+
+        # Clean the server name (remove 'tcp:' prefix if present)
+        server = self.server[4:] if self.server.startswith("tcp:") else self.server
+        conn_str = (
+            f"DRIVER={{{self.odbc_driver}}};SERVER={server};DATABASE={self.database};"
+            f"UID={self.username};PWD={self.password};Encrypt=yes;TrustServerCertificate=yes;ConnectionTimeout=30;"
+        )
+        return f"{dialect}:///?odbc_connect={urllib.parse.quote_plus(conn_str)}"
+
+    def get_async_url(self) -> Optional[str]:
+        """URL for the async engine, built for aioodbc unless SQL_ASYNC_URL is set"""
+        if self.async_url:
+            return self.async_url
+        return self.get_odbc_url("mssql+aioodbc")
@@ -0,0 +1,38 @@
+from dataclasses import dataclass, field
+from typing import List
+import os
+
+
+@dataclass
+class NatsConfig:
+    """Configuration settings for the shared NATS connection"""
+    # Connection settings
+    servers: List[str] = field(
+        default_factory=lambda: os.getenv("NATS_SERVER_URL", "nats://localhost:4222").split(",")
+    )
+    user: str = os.getenv("NATS_USER")
+    password: str = os.getenv("NATS_PASSWORD")
+    name: str = os.getenv("NATS_CLIENT_NAME", "chatbot-sync")
+
+    # Reconnect policy (-1 retries forever)
+    max_reconnect_attempts: int = int(os.getenv("NATS_MAX_RECONNECT_ATTEMPTS", "-1"))
+    reconnect_time_wait: float = float(os.getenv("NATS_RECONNECT_TIME_WAIT", "2"))
+    connect_timeout: float = float(os.getenv("NATS_CONNECT_TIMEOUT", "5"))
+
+    # Shutdown settings
+    drain_timeout: float = float(os.getenv("NATS_DRAIN_TIMEOUT", "30"))
+
+    # JetStream settings (durable pull consumers instead of core subscriptions)
+    jetstream_enabled: bool = os.getenv("NATS_JETSTREAM", "false").lower() in ("1", "true", "yes")
+    stream_name: str = os.getenv("NATS_STREAM_NAME", "CATALOG_SYNC")
+    stream_subjects: List[str] = field(
+        default_factory=lambda: ["product.sync", "variant.*", "promotion.*", "order.*"]
+    )
+    durable_prefix: str = os.getenv("NATS_DURABLE_PREFIX", "chatbot")
+    fetch_batch_size: int = int(os.getenv("NATS_FETCH_BATCH_SIZE", "100"))
+    fetch_timeout: float = float(os.getenv("NATS_FETCH_TIMEOUT", "1"))
+    ack_wait: float = float(os.getenv("NATS_ACK_WAIT", "60"))
+    max_deliver: int = int(os.getenv("NATS_MAX_DELIVER", "5"))
+    # Redelivery backoff: nak_delay doubles per delivery up to nak_max_delay
+    nak_delay: float = float(os.getenv("NATS_NAK_DELAY", "5"))
+    nak_max_delay: float = float(os.getenv("NATS_NAK_MAX_DELAY", "60"))
@@ -0,0 +1,11 @@
+import random
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Exponential backoff with equal jitter for the given 1-based attempt.
+
+    Half of the capped exponential step is always waited and a random share
+    of the other half is added, so retries from many callers spread out.
+    """
+    backoff = min(max_delay, base_delay * (2 ** max(attempt - 1, 0)))
+    return backoff / 2 + random.uniform(0, backoff / 2)
@@ -0,0 +1,164 @@
+"""
+Build the binary intent-embedding artifact from src/core/intents_data.py
+
+The artifact is a pre-normalized float32 matrix (intent_embeddings.npy) that
+the classifier memory-maps at startup, plus a JSON sidecar with the tag and
+pattern of every row, the model name and a hash of the source patterns.
+
+Usage:
+    python -m src.core.build_intent_embeddings [--batch-size 64] [--force]
+"""
+
+from typing import Dict, List, Any, Tuple, Optional
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+
+from src.core.intents_data import intents_data
+from src.core.intent_index import IntentIndex
+
+logger = logging.getLogger(__name__)
+
+CORE_DIR = Path(__file__).resolve().parent
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_BATCH_SIZE = 64
+MATRIX_FILE_NAME = "intent_embeddings.npy"
+METADATA_FILE_NAME = "intent_embeddings.meta.json"
+
+
+def flatten_intents(data: Dict[str, List[str]]) -> Tuple[List[str], List[str]]:
+    """Flatten {tag: [patterns]} into parallel tag and pattern lists"""
+    tags, patterns = [], []
+    for tag, examples in data.items():
+        for pattern in examples:
+            tags.append(tag)
+            patterns.append(pattern)
+    return tags, patterns
+
+
+def compute_source_hash(data: Dict[str, List[str]], model_name: str) -> str:
+    """Hash the intent patterns together with the model that encodes them"""
+    payload = json.dumps({"model_name": model_name, "intents": data}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def read_metadata(artifact_dir: Path = CORE_DIR) -> Optional[Dict[str, Any]]:
+    """Read the artifact sidecar, returning None when it is missing or unreadable"""
+    try:
+        with open(artifact_dir / METADATA_FILE_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def encode_intents(model, patterns: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+    """Encode patterns in batches into an L2-normalized float32 matrix"""
+    batches = []
+    for start in range(0, len(patterns), batch_size):
+        batch = patterns[start:start + batch_size]
+        batches.append(np.asarray(model.encode(batch, batch_size=batch_size, convert_to_numpy=True), dtype=np.float32))
+    matrix = np.concatenate(batches, axis=0) if batches else np.empty((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def build_intent_embeddings(
+    model,
+    model_name: str = DEFAULT_MODEL_NAME,
+    artifact_dir: Path = CORE_DIR,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    write: bool = True
+) -> IntentIndex:
+    """Encode intents_data and (optionally) write the artifact, returning the index"""
+    tags, patterns = flatten_intents(intents_data)
+    matrix = encode_intents(model, patterns, batch_size=batch_size)
+    metadata = {
+        "model_name": model_name,
+        "source_hash": compute_source_hash(intents_data, model_name),
+        "count": int(matrix.shape[0]),
+        "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "tags": tags,
+        "patterns": patterns
+    }
+
+    if write:
+        artifact_dir.mkdir(parents=True, exist_ok=True)
+        matrix_path = artifact_dir / MATRIX_FILE_NAME
+        metadata_path = artifact_dir / METADATA_FILE_NAME
+        # Write to temporary files first so a concurrent reader never sees a torn artifact
+        tmp_matrix_path = artifact_dir / f".{MATRIX_FILE_NAME}.{os.getpid()}.tmp"
+        tmp_metadata_path = artifact_dir / f".{METADATA_FILE_NAME}.{os.getpid()}.tmp"
+        with open(tmp_matrix_path, "wb") as f:
+            np.save(f, matrix)
+        with open(tmp_metadata_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_matrix_path, matrix_path)
+        os.replace(tmp_metadata_path, metadata_path)
+        logger.info(f"Wrote {metadata['count']} intent embeddings to {matrix_path}")
+
+    return IntentIndex(matrix, tags, patterns, normalized=True)
+
+
+def load_or_build_intent_index(
+    model,
+    model_name: str = DEFAULT_MODEL_NAME,
+    artifact_dir: Path = CORE_DIR,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> IntentIndex:
+    """Memory-map the artifact, rebuilding it first when it is missing or stale"""
+    metadata = read_metadata(artifact_dir)
+    expected_hash = compute_source_hash(intents_data, model_name)
+    matrix_path = artifact_dir / MATRIX_FILE_NAME
+
+    if metadata and metadata.get("source_hash") == expected_hash and matrix_path.exists():
+        try:
+            return IntentIndex.from_artifact(str(matrix_path), metadata)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load intent artifact, rebuilding: {e}")
+    else:
+        logger.info("Intent artifact missing or out of date with intents_data, rebuilding")
+
+    try:
+        build_intent_embeddings(model, model_name, artifact_dir, batch_size)
+        return IntentIndex.from_artifact(str(matrix_path), read_metadata(artifact_dir))
+    except OSError as e:
+        # Read-only deployments still get a correct (in-memory) index
+        logger.warning(f"Could not write intent artifact to {artifact_dir}: {e}")
+        return build_intent_embeddings(model, model_name, artifact_dir, batch_size, write=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the binary intent-embedding artifact")
+    parser.add_argument("--model-name", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--output-dir", type=Path, default=CORE_DIR)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the artifact is up to date")
+    args = parser.parse_args()
+
+    metadata = read_metadata(args.output_dir)
+    if (
+        not args.force
+        and metadata
+        and metadata.get("source_hash") == compute_source_hash(intents_data, args.model_name)
+        and (args.output_dir / MATRIX_FILE_NAME).exists()
+    ):
+        logger.info("Intent artifact is up to date")
+        return
+
+    from src.services.embedding_registry import embedding_model_registry
+    model = embedding_model_registry.acquire(args.model_name, args.device)
+    try:
+        build_intent_embeddings(model, args.model_name, args.output_dir, args.batch_size)
+    finally:
+        embedding_model_registry.release(args.model_name, args.device)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
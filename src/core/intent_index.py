@@ -0,0 +1,65 @@
+from typing import List, Dict, Any, Tuple, Sequence, Union
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class IntentIndex:
+    """Memory-resident matrix of intent example embeddings.
+
+    Rows are L2-normalized float32 vectors kept in one contiguous array with a
+    parallel tag index, so cosine similarity against every example is a single
+    matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        tags: Sequence[str],
+        patterns: Sequence[str] = (),
+        normalized: bool = False
+    ):
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if not normalized:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = np.ascontiguousarray(matrix / norms)
+        self.matrix = matrix
+        self.tags = np.asarray(tags, dtype=object)
+        self.patterns = list(patterns)
+
+    @classmethod
+    def from_artifact(cls, matrix_path: str, metadata: Dict[str, Any]) -> "IntentIndex":
+        """Memory-map a pre-normalized .npy matrix written by build_intent_embeddings"""
+        matrix = np.load(matrix_path, mmap_mode='r')
+        if matrix.shape[0] != len(metadata["tags"]):
+            raise ValueError(
+                f"Intent artifact {matrix_path} has {matrix.shape[0]} rows "
+                f"but {len(metadata['tags'])} tags"
+            )
+        logger.info(f"Memory-mapped {matrix.shape[0]} intent examples from {matrix_path}")
+        return cls(matrix, metadata["tags"], metadata.get("patterns", ()), normalized=True)
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def top_k(self, query_embedding: Union[Sequence[float], np.ndarray], k: int = 3) -> Tuple[List[str], np.ndarray]:
+        """Return the tags and cosine similarities of the k nearest examples, best first"""
+        if len(self) == 0:
+            return [], np.empty(0, dtype=np.float32)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        similarities = self.matrix @ query
+        k = min(k, len(similarities))
+        if k < len(similarities):
+            candidates = np.argpartition(similarities, -k)[-k:]
+        else:
+            candidates = np.arange(len(similarities))
+        order = candidates[np.argsort(similarities[candidates])[::-1]]
+
+        return self.tags[order].tolist(), similarities[order]
@@ -1,13 +1,18 @@
 import os
 import logging
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
 from datetime import datetime
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, make_url, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 import urllib.parse
 
+from src.config.database_config import DatabaseConfig
+from src.database.pool_metrics import PoolMetrics, TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument_engine
+from src.monitoring.metrics import metrics_registry
+
 # Load environment variables if not already done
 load_dotenv()
 
@@ -15,8 +20,41 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global engine variable
+# Engines and their session factories, created once on first use
+db_config = DatabaseConfig()
 engine = None
+SessionLocal = None
+async_engine = None
+AsyncSessionLocal = None
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+metrics_registry.register("db_pool", pool_metrics.get_stats)
+metrics_registry.register("db_pool_async", async_pool_metrics.get_stats)
+
+def _pool_kwargs(url, poolclass) -> dict:
+    """Pool settings from config, skipped for in-memory SQLite which uses a static pool"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": db_config.pool_size,
+        "max_overflow": db_config.max_overflow,
+        "pool_timeout": db_config.pool_timeout,
+        "pool_recycle": db_config.pool_recycle,
+        "pool_pre_ping": db_config.pool_pre_ping
+    }
+
+def _create_pooled_engine(url, **kwargs):
+    """Create an engine on an instrumented QueuePool and check that it connects"""
+    new_engine = create_engine(url, echo=db_config.echo, **_pool_kwargs(url, TimedQueuePool), **kwargs)
+    instrument_engine(new_engine, pool_metrics)
+
+    # Test the connection
+    with new_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return new_engine
 
 def get_db_engine():
     """
@@ -31,11 +69,17 @@ def get_db_engine():
         return engine
         
     try:
-        # Get connection parameters from environment variables
-        server = os.getenv("SQL_SERVER")
-        database = os.getenv("SQL_DATABASE")
-        username = os.getenv("SQL_USERNAME")
-        password = os.getenv("SQL_PASSWORD")
+        # An explicit URL (e.g. sqlite:///./data/local.db) skips the SQL Server drivers
+        if db_config.url:
+            engine = _create_pooled_engine(db_config.url)
+            logger.info("Database connection established successfully using SQL_URL")
+            return engine
+
+        # Get connection parameters from config
+        server = db_config.server
+        database = db_config.database
+        username = db_config.username
+        password = db_config.password
         
         if not all([server, database, username, password]):
             logger.error("SQL connection parameters not found in environment variables")
@@ -50,32 +94,12 @@ def get_db_engine():
             import pyodbc
             logger.info("Using pyodbc driver for connection")
             
-            # URL encode the password to handle special characters
-            quoted_password = urllib.parse.quote_plus(password)
-            
-            # The direct pyodbc connection approach for macOS
-            # Use DSN-less connection which is more reliable on macOS with Azure SQL
-            conn_str = f'DRIVER={{ODBC Driver 18 for SQL Server}};SERVER=127.0.0.1;DATABASE=INTERIOR_SHOPPING;UID={username};PWD={quoted_password};Encrypt=yes;TrustServerCertificate=yes;ConnectionTimeout=30;'
-            
-            # Create connection string for SQLAlchemy
-            connection_url = f"mssql+pyodbc:///?odbc_connect={urllib.parse.quote_plus(conn_str)}"
+            # DSN-less connection string shared with the async aioodbc engine
+            connection_url = db_config.get_odbc_url("mssql+pyodbc")
             
             # Create the SQLAlchemy engine with connection pooling
-            engine = create_engine(
-                connection_url,
-                poolclass=QueuePool,
-                pool_size=5,
-                max_overflow=10,
-                pool_timeout=30,
-                pool_recycle=1800,  
-                pool_pre_ping=True,  
-                fast_executemany=True  
-            )
-            
-            # Test the connection
-            with engine.connect() as connection:
-                connection.execute(text("SELECT 1"))
-                
+            engine = _create_pooled_engine(connection_url, fast_executemany=True)
+
             logger.info("Database connection established successfully using pyodbc")
             return engine
             
@@ -99,20 +123,8 @@ def get_db_engine():
             connection_string = f"mssql+pymssql://{username}:{password}@{host}:{port}/{database}"
             
             # Create the SQLAlchemy engine with connection pooling
-            engine = create_engine(
-                connection_string,
-                poolclass=QueuePool,
-                pool_size=5,
-                max_overflow=10,
-                pool_timeout=30,
-                pool_recycle=1800,  # Recycle connections after 30 minutes (Azure best practice)
-                pool_pre_ping=True  # Verify connections before using from pool
-            )
-            
-            # Test the connection
-            with engine.connect() as connection:
-                connection.execute(text("SELECT 1"))
-                
+            engine = _create_pooled_engine(connection_string)
+
             logger.info("Database connection established successfully using pymssql")
             return engine
             
@@ -120,6 +132,25 @@ def get_db_engine():
         logger.error(f"Failed to create SQLAlchemy engine: {str(e)}")
         return None
 
+def get_sessionmaker():
+    """
+    Returns the cached sessionmaker bound to the engine.
+
+    Returns:
+        The sessionmaker, or None if the engine could not be created
+    """
+    global SessionLocal
+
+    if SessionLocal is not None:
+        return SessionLocal
+
+    engine = get_db_engine()
+    if engine is None:
+        return None
+
+    SessionLocal = sessionmaker(bind=engine)
+    return SessionLocal
+
 def create_session():
     """
     Creates a new SQLAlchemy session.
@@ -136,9 +167,7 @@ def create_session():
         }
     
     try:
-        # Create a sessionmaker bound to the engine
-        Session = sessionmaker(bind=engine)
-        session = Session()
+        session = get_sessionmaker()()
         
         return {
             "success": True,
@@ -221,9 +250,224 @@ def execute_sql_query(query, params=None, timeout=30):
     finally:
         session.close()
 
+def _stream_options(chunk_size, timeout):
+    return {
+        "stream_results": True,
+        "yield_per": chunk_size,
+        "timeout": timeout or db_config.query_timeout
+    }
+
+def _project(partition, columns) -> List[Dict[str, Any]]:
+    if columns:
+        return [{column: row[column] for column in columns} for row in partition]
+    return [dict(row) for row in partition]
+
+def stream_sql_query(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: int = 1000,
+    chunked: bool = False,
+    timeout: Optional[int] = None
+) -> Iterator[Any]:
+    """
+    Execute a SELECT through a server-side cursor and yield rows as they arrive.
+
+    Unlike execute_sql_query, at most chunk_size rows are held in memory.
+    The session stays open until the generator is exhausted or closed.
+
+    Args:
+        query (str): The SQL query to execute
+        params (dict, optional): Parameters for the query
+        columns (list, optional): Only keep these result columns in each row
+        chunk_size (int): Rows fetched per round trip
+        chunked (bool): Yield lists of up to chunk_size rows instead of single rows
+        timeout (int, optional): Query timeout in seconds, defaults to SQL_QUERY_TIMEOUT
+
+    Yields:
+        dict (or list of dicts when chunked) per row
+
+    Raises:
+        ConnectionError: If the database engine cannot be created
+        SQLAlchemyError: If the query fails
+    """
+    session_factory = get_sessionmaker()
+    if session_factory is None:
+        raise ConnectionError("Failed to create database engine")
+
+    start_time = datetime.now()
+    rows = 0
+    with session_factory() as session:
+        result = session.execute(text(query), params or {}, execution_options=_stream_options(chunk_size, timeout))
+        for partition in result.mappings().partitions(chunk_size):
+            rows += len(partition)
+            chunk = _project(partition, columns)
+            if chunked:
+                yield chunk
+            else:
+                for row in chunk:
+                    yield row
+
+    execution_time = (datetime.now() - start_time).total_seconds()
+    logger.info(f"Streamed {rows} rows in {execution_time:.2f} seconds")
+
+async def stream_sql_query_async(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: int = 1000,
+    chunked: bool = False,
+    timeout: Optional[int] = None
+) -> AsyncIterator[Any]:
+    """
+    Async counterpart of stream_sql_query running on the async engine.
+
+    Yields:
+        dict (or list of dicts when chunked) per row
+
+    Raises:
+        ConnectionError: If the async database engine cannot be created
+        SQLAlchemyError: If the query fails
+    """
+    session_factory = get_async_sessionmaker()
+    if session_factory is None:
+        raise ConnectionError("Failed to create database engine")
+
+    start_time = datetime.now()
+    rows = 0
+    async with session_factory() as session:
+        result = await session.stream(text(query), params or {}, execution_options=_stream_options(chunk_size, timeout))
+        async for partition in result.mappings().partitions(chunk_size):
+            rows += len(partition)
+            chunk = _project(partition, columns)
+            if chunked:
+                yield chunk
+            else:
+                for row in chunk:
+                    yield row
+
+    execution_time = (datetime.now() - start_time).total_seconds()
+    logger.info(f"Streamed {rows} rows in {execution_time:.2f} seconds")
+
 def close_connection(session):
     """
     Closes the database session.
     """
     if session:
         session.close()
+
+
+def get_async_engine():
+    """
+    Creates or returns the async SQLAlchemy engine.
+
+    Uses aioodbc against SQL Server, or SQL_ASYNC_URL when set
+    (e.g. sqlite+aiosqlite:///./data/local.db for local testing).
+
+    Returns:
+        The AsyncEngine instance, or None if no connection is configured
+    """
+    global async_engine
+
+    if async_engine is not None:
+        return async_engine
+
+    url = db_config.get_async_url()
+    if not url:
+        logger.error("SQL connection parameters not found in environment variables")
+        return None
+
+    try:
+        url = make_url(url)
+        async_engine = create_async_engine(url, echo=db_config.echo, **_pool_kwargs(url, TimedAsyncAdaptedQueuePool))
+        instrument_engine(async_engine.sync_engine, async_pool_metrics)
+        logger.info(f"Async database engine created for {url.get_backend_name()}+{url.get_driver_name()}")
+        return async_engine
+    except Exception as e:
+        logger.error(f"Failed to create async SQLAlchemy engine: {str(e)}")
+        return None
+
+def get_async_sessionmaker():
+    """
+    Returns the cached async_sessionmaker bound to the async engine.
+
+    Returns:
+        The async_sessionmaker, or None if the engine could not be created
+    """
+    global AsyncSessionLocal
+
+    if AsyncSessionLocal is not None:
+        return AsyncSessionLocal
+
+    engine = get_async_engine()
+    if engine is None:
+        return None
+
+    # Keep loaded attributes usable after commit without another round trip
+    AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return AsyncSessionLocal
+
+async def execute_sql_query_async(query, params=None, timeout=None):
+    """
+    Execute a SQL query on the async engine and return the results.
+
+    Args:
+        query (str): The SQL query to execute
+        params (dict, optional): Parameters for the query
+        timeout (int, optional): Query timeout in seconds, defaults to SQL_QUERY_TIMEOUT
+
+    Returns:
+        dict: A dictionary containing the query results or error information
+    """
+    start_time = datetime.now()
+    session_factory = get_async_sessionmaker()
+
+    if session_factory is None:
+        return {
+            "success": False,
+            "error": "Failed to create database engine"
+        }
+
+    execution_options = {"timeout": timeout or db_config.query_timeout}
+    async with session_factory() as session:
+        try:
+            result = await session.execute(text(query), params or {}, execution_options=execution_options)
+            execution_time = (datetime.now() - start_time).total_seconds()
+
+            if result.returns_rows:
+                results = [dict(row) for row in result.mappings()]
+                logger.info(f"Query executed in {execution_time:.2f} seconds")
+                return {
+                    "success": True,
+                    "results": results,
+                    "execution_time": execution_time
+                }
+
+            # For non-SELECT queries (INSERT, UPDATE, DELETE)
+            await session.commit()
+            logger.info(f"Query executed in {execution_time:.2f} seconds")
+            return {
+                "success": True,
+                "message": "Query executed successfully",
+                "execution_time": execution_time
+            }
+        except Exception as e:
+            await session.rollback()
+            execution_time = (datetime.now() - start_time).total_seconds()
+            logger.error(f"Query execution failed in {execution_time:.2f} seconds: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Query execution failed: {str(e)}",
+                "execution_time": execution_time
+            }
+
+async def close_async_engine():
+    """
+    Disposes the async engine and its pooled connections.
+    """
+    global async_engine, AsyncSessionLocal
+
+    if async_engine is not None:
+        await async_engine.dispose()
+    async_engine = None
+    AsyncSessionLocal = None
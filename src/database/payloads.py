@@ -0,0 +1,102 @@
+"""
+Sync payloads built from SQL rows
+
+Converts Variants, Promotions and Orders rows to the same payload shape the
+NATS sync events carry. Shared by the reindex command and the request-path
+variant queries.
+"""
+
+from typing import Dict, Any
+import datetime
+import decimal
+import uuid
+
+from src.database.models import Orders, Promotions, Variants
+
+
+def _to_primitive(value: Any) -> Any:
+    """Convert SQL column values to JSON-friendly primitives"""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def variant_to_payload(variant: Variants) -> Dict[str, Any]:
+    """Build a variant sync payload from a Variants row"""
+    product = variant.Products_
+    product_price = _to_primitive(product.Price) if product else 0.0
+    price_adjustment = _to_primitive(variant.PriceAdjustment) or 0.0
+    return {
+        "id": _to_primitive(variant.Id),
+        "product_id": _to_primitive(variant.ProductId),
+        "name": product.Name if product else "",
+        "description": product.Description if product else "",
+        "category": product.Categories_.Name if product and product.Categories_ else "",
+        "model_url": product.ModelUrl if product else None,
+        "sku": variant.Sku,
+        "price": (product_price or 0.0) + price_adjustment,
+        "price_adjustment": price_adjustment,
+        "stock_quantity": variant.Stock,
+        "is_active": variant.IsActive,
+        "image_urls": variant.ImageUrls,
+        "attributes": [
+            {
+                "name": attribute.AttributeValues_.Attributes_.Name,
+                "value": attribute.AttributeValues_.Value
+            }
+            for attribute in variant.VariantAttributes
+            if attribute.AttributeValues_ and attribute.AttributeValues_.Attributes_
+        ],
+        "updated_at": _to_primitive(variant.UpdatedAt)
+    }
+
+
+def promotion_to_payload(promotion: Promotions) -> Dict[str, Any]:
+    """Build a promotion sync payload from a Promotions row"""
+    return {
+        "id": _to_primitive(promotion.Id),
+        "name": promotion.Name,
+        "code": promotion.Code,
+        "description": promotion.Description or "",
+        "discount_percentage": _to_primitive(promotion.DiscountPercentage),
+        "start_date": _to_primitive(promotion.StartDate),
+        "end_date": _to_primitive(promotion.EndDate),
+        "is_active": promotion.IsActive,
+        "customer_level": promotion.CustomerLevel,
+        "type": promotion.Type,
+        "product_ids": promotion.ProductIds,
+        "updated_at": _to_primitive(promotion.UpdatedAt)
+    }
+
+
+def order_to_payload(order: Orders) -> Dict[str, Any]:
+    """Build an order sync payload from an Orders row"""
+    address = order.Addresses_
+    shipping_address = ", ".join(filter(None, [
+        address.Street, address.Ward, address.District, address.City, address.PostalCode, address.Country
+    ])) if address else ""
+    return {
+        "id": _to_primitive(order.Id),
+        "user_id": _to_primitive(order.UserId),
+        "status": order.Status,
+        "total_price": _to_primitive(order.TotalPrice),
+        "discount": _to_primitive(order.Discount),
+        "final_price": _to_primitive(order.FinalPrice),
+        "order_date": _to_primitive(order.OrderDate),
+        "payment_method": order.PaymentMethod,
+        "shipping_address": shipping_address,
+        "order_details": [
+            {
+                "variant_id": _to_primitive(detail.VariantId),
+                "quantity": detail.Quantity,
+                "unit_price": _to_primitive(detail.UnitPrice),
+                "total_price": _to_primitive(detail.TotalPrice)
+            }
+            for detail in order.OrderDetails
+        ],
+        "updated_at": _to_primitive(order.UpdatedAt)
+    }
@@ -0,0 +1,140 @@
+from typing import Dict, Any, Optional
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from src.monitoring.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Key on the connection record holding when it was checked out
+CHECKOUT_AT_KEY = "_checkout_at"
+
+
+class PoolMetrics:
+    """Connection pool counters and latency histograms for one engine.
+
+    wait is how long callers waited for a connection, including time spent
+    queued on pool_timeout; hold is how long a connection stayed checked out.
+    The pool is looked up through the engine on every read, because
+    engine.dispose() replaces it.
+    """
+
+    def __init__(self):
+        self.engine: Engine = None
+        self.wait = LatencyHistogram()
+        self.hold = LatencyHistogram()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> Optional[Pool]:
+        return self.engine.pool if self.engine is not None else None
+
+    def instrument(self, engine: Engine) -> None:
+        """Attach pool event listeners, which carry over to pools the engine recreates"""
+        self.engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info[CHECKOUT_AT_KEY] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        checkout_at = connection_record.info.pop(CHECKOUT_AT_KEY, None)
+        if checkout_at is not None:
+            self.hold.observe((time.perf_counter() - checkout_at) * 1000)
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, started_at: float, timed_out: bool = False) -> None:
+        self.wait.observe((time.perf_counter() - started_at) * 1000)
+        if timed_out:
+            with self._lock:
+                self.timeouts += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool occupancy, counters and latency snapshots"""
+        stats: Dict[str, Any] = {}
+        if isinstance(self.pool, QueuePool):
+            stats.update({
+                "size": self.pool.size(),
+                "checked_out": self.pool.checkedout(),
+                "checked_in": self.pool.checkedin(),
+                "overflow": self.pool.overflow(),
+                "max_overflow": self.pool._max_overflow,
+                "timeout": self.pool.timeout()
+            })
+        with self._lock:
+            stats.update({
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts
+            })
+        stats["wait"] = self.wait.snapshot()
+        stats["hold"] = self.hold.snapshot()
+        return stats
+
+
+class TimedPoolMixin:
+    """Times how long each checkout waits for a free connection"""
+
+    metrics: PoolMetrics = None
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool, which must keep reporting
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_wait(started_at, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(started_at)
+        return connection
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    """QueuePool recording checkout wait times"""
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording checkout wait times"""
+
+
+def instrument_engine(engine, metrics: PoolMetrics) -> PoolMetrics:
+    """Attach metrics to an engine created with one of the timed pools"""
+    pool = engine.pool
+    if isinstance(pool, TimedPoolMixin):
+        pool.metrics = metrics
+    metrics.instrument(engine)
+    return metrics
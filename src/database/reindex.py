@@ -0,0 +1,216 @@
+"""
+Full catalog bootstrap / reindex from SQL into ChromaDB
+
+Streams Variants (with their Products and attributes), Promotions and Orders
+from the SQL database with server-side cursors, converts each row to the same
+payload shape the NATS sync events carry, and bulk-upserts them into the
+matching ChromaDB collection. Progress is checkpointed after every batch so an
+interrupted run resumes where it stopped.
+
+Usage:
+    python -m src.database.reindex [--collections variants promotions orders]
+                                   [--batch-size 500] [--restart]
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Callable, Iterator
+from pathlib import Path
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import time
+import uuid
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from src.database.db_connection import create_session
+from src.database.models import (
+    AttributeValues, Orders, Products, Promotions,
+    VariantAttributes, Variants
+)
+from src.database.payloads import order_to_payload, promotion_to_payload, variant_to_payload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CHECKPOINT_PATH = Path(os.getenv("REINDEX_CHECKPOINT_PATH", "./data/reindex_checkpoint.json"))
+
+
+@dataclass
+class ReindexSource:
+    """How to stream one SQL model into one ChromaDB collection"""
+    model: Any
+    loader_options: List[Any]
+    to_payload: Callable[[Any], Dict[str, Any]]
+    service_factory: Callable[[], Any]
+    upsert_method: str
+
+
+def _variant_service():
+    from src.services.variant_service import VariantService
+    return VariantService()
+
+
+def _promotion_service():
+    from src.services.promotion_service import PromotionService
+    return PromotionService()
+
+
+def _order_service():
+    from src.services.order_service import OrderService
+    return OrderService()
+
+
+SOURCES: Dict[str, ReindexSource] = {
+    "variants": ReindexSource(
+        model=Variants,
+        loader_options=[
+            joinedload(Variants.Products_).joinedload(Products.Categories_),
+            selectinload(Variants.VariantAttributes)
+                .joinedload(VariantAttributes.AttributeValues_)
+                .joinedload(AttributeValues.Attributes_)
+        ],
+        to_payload=variant_to_payload,
+        service_factory=_variant_service,
+        upsert_method="upsert_variants"
+    ),
+    "promotions": ReindexSource(
+        model=Promotions,
+        loader_options=[],
+        to_payload=promotion_to_payload,
+        service_factory=_promotion_service,
+        upsert_method="upsert_promotions"
+    ),
+    "orders": ReindexSource(
+        model=Orders,
+        loader_options=[
+            joinedload(Orders.Addresses_),
+            selectinload(Orders.OrderDetails)
+        ],
+        to_payload=order_to_payload,
+        service_factory=_order_service,
+        upsert_method="upsert_orders"
+    )
+}
+
+
+class ReindexCheckpoint:
+    """Last successfully upserted id per collection, persisted as JSON"""
+
+    def __init__(self, path: Path = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self._state: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self._state = json.loads(self.path.read_text())
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+
+    def get(self, collection: str) -> Optional[str]:
+        return self._state.get(collection, {}).get("last_id")
+
+    def is_complete(self, collection: str) -> bool:
+        return self._state.get(collection, {}).get("complete", False)
+
+    def save(self, collection: str, last_id: Optional[str], processed: int, complete: bool = False) -> None:
+        self._state[collection] = {
+            "last_id": last_id,
+            "processed": processed,
+            "complete": complete,
+            "updated_at": datetime.datetime.now().isoformat()
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._state, indent=2))
+        os.replace(tmp_path, self.path)
+
+    def clear(self, collection: str) -> None:
+        self._state.pop(collection, None)
+
+
+class CatalogReindexer:
+    """Streams SQL rows into ChromaDB in resumable batches"""
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, checkpoint: Optional[ReindexCheckpoint] = None):
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint or ReindexCheckpoint()
+
+    def _stream(self, session: Session, source: ReindexSource, after_id: Optional[str]) -> Iterator[List[Any]]:
+        """Yield batches of ORM rows ordered by primary key using a server-side cursor"""
+        statement = select(source.model).options(*source.loader_options).order_by(source.model.Id)
+        if after_id:
+            statement = statement.where(source.model.Id > uuid.UUID(after_id))
+        result = session.execute(
+            statement.execution_options(stream_results=True, yield_per=self.batch_size)
+        )
+        for partition in result.scalars().partitions():
+            yield partition
+
+    async def reindex(self, session: Session, collection: str, restart: bool = False) -> int:
+        """Reindex one collection, resuming from its checkpoint unless restart is set"""
+        source = SOURCES[collection]
+        if restart:
+            self.checkpoint.clear(collection)
+        elif self.checkpoint.is_complete(collection):
+            logger.info(f"{collection}: already complete, use --restart to reindex again")
+            return 0
+
+        after_id = self.checkpoint.get(collection)
+        total = session.execute(select(func.count()).select_from(source.model)).scalar_one()
+        service = source.service_factory()
+        upsert = getattr(service, source.upsert_method)
+
+        processed = 0
+        last_id = after_id
+        started_at = time.perf_counter()
+        logger.info(f"{collection}: reindexing {total} rows" + (f" after {after_id}" if after_id else ""))
+
+        for rows in self._stream(session, source, after_id):
+            payloads = [source.to_payload(row) for row in rows]
+            if not await upsert(payloads):
+                raise RuntimeError(f"Bulk upsert into {collection} failed after id {last_id}")
+
+            processed += len(payloads)
+            last_id = payloads[-1]["id"]
+            self.checkpoint.save(collection, last_id, processed)
+
+            elapsed = time.perf_counter() - started_at
+            logger.info(
+                f"{collection}: {processed}/{total} rows "
+                f"({processed / elapsed:.1f} rows/s, last id {last_id})"
+            )
+
+        self.checkpoint.save(collection, last_id, processed, complete=True)
+        elapsed = time.perf_counter() - started_at
+        logger.info(f"{collection}: done, {processed} rows in {elapsed:.1f}s")
+        return processed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Reindex the catalog from SQL into ChromaDB")
+    parser.add_argument("--collections", nargs="+", choices=list(SOURCES), default=list(SOURCES))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT_PATH)
+    parser.add_argument("--restart", action="store_true", help="Ignore existing checkpoints")
+    args = parser.parse_args()
+
+    session_result = create_session()
+    if not session_result.get("success"):
+        raise SystemExit(session_result.get("error", "Failed to create database session"))
+
+    session = session_result["session"]
+    reindexer = CatalogReindexer(batch_size=args.batch_size, checkpoint=ReindexCheckpoint(args.checkpoint))
+    try:
+        for collection in args.collections:
+            await reindexer.reindex(session, collection, restart=args.restart)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,11 @@
+from typing import Optional, Any
+
+class GeminiClientError(Exception):
+    """Base exception class for Gemini client errors"""
+    def __init__(self, message: str, details: Optional[Any] = None):
+        super().__init__(message)
+        self.details = details
+
+class GeminiTimeoutError(GeminiClientError):
+    """Raised when a Gemini call does not finish within its timeout"""
+    pass
@@ -0,0 +1,148 @@
+from typing import Dict, List, Any, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import time
+
+from nats.aio.msg import Msg
+
+from src.handlers.nats_connection import NatsConnectionManager, nats_manager
+from src.monitoring.metrics import metrics_registry
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Publishers ask for binary acks by sending this header on their events
+ACK_ENCODING_HEADER = "Ack-Encoding"
+MSGPACK = "msgpack"
+JSON = "json"
+
+
+class AckAggregator:
+    """Collects per-event results and publishes one ack per subject per batch.
+
+    Results are buffered per ack subject (e.g. variant.updated.ack) and
+    published when a processed batch ends, when max_batch results are
+    pending, or after interval_ms. Each ack lists the succeeded and failed
+    ids. Acks are JSON unless the publisher asked for msgpack through the
+    Ack-Encoding header and msgpack is installed.
+    """
+
+    def __init__(
+        self,
+        manager: NatsConnectionManager = nats_manager,
+        max_batch: Optional[int] = None,
+        interval_ms: Optional[float] = None
+    ):
+        self.manager = manager
+        self.max_batch = max_batch or int(os.getenv("SYNC_ACK_MAX_BATCH", "500"))
+        self.interval_ms = interval_ms if interval_ms is not None else float(os.getenv("SYNC_ACK_INTERVAL_MS", "250"))
+        self._pending: Dict[str, List[Tuple[Optional[str], bool, Optional[str]]]] = {}
+        self._encodings: Dict[str, str] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self.recorded = 0
+        self.published = 0
+        self.bytes_published = 0
+        self.publish_errors = 0
+
+    def _negotiate(self, ack_subject: str, msg: Optional[Msg]) -> None:
+        """Remember the ack encoding the publisher asked for on this subject"""
+        headers = getattr(msg, "headers", None) if msg is not None else None
+        if not headers:
+            return
+        requested = headers.get(ACK_ENCODING_HEADER, "").lower()
+        if requested == MSGPACK and msgpack is None:
+            logger.warning("msgpack acks requested but msgpack is not installed, using JSON")
+            requested = JSON
+        if requested in (MSGPACK, JSON):
+            self._encodings[ack_subject] = requested
+
+    async def record(
+        self,
+        subject: str,
+        entity_id: Optional[str],
+        success: bool,
+        error: Optional[str] = None,
+        msg: Optional[Msg] = None
+    ) -> None:
+        """Buffer the result of one event received on subject"""
+        ack_subject = f"{subject}.ack"
+        self._negotiate(ack_subject, msg)
+        pending = self._pending.setdefault(ack_subject, [])
+        pending.append((entity_id, success, error))
+        self.recorded += 1
+
+        if len(pending) >= self.max_batch:
+            await self._publish(ack_subject)
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval_ms / 1000, self._flush_in_background)
+
+    def _flush_in_background(self) -> None:
+        self._timer = None
+        self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Publish every buffered ack"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for ack_subject in list(self._pending):
+            await self._publish(ack_subject)
+
+    def _encode(self, ack_subject: str, body: Dict[str, Any]) -> Tuple[bytes, Optional[Dict[str, str]]]:
+        if self._encodings.get(ack_subject) == MSGPACK:
+            return msgpack.packb(body), {"Content-Type": "application/msgpack"}
+        return json.dumps(body, separators=(",", ":")).encode(), None
+
+    async def _publish(self, ack_subject: str) -> None:
+        results = self._pending.pop(ack_subject, None)
+        if not results:
+            return
+
+        # Repeated events for one id collapse to a single entry
+        failed = list(dict.fromkeys(entity_id for entity_id, success, _ in results if not success))
+        body: Dict[str, Any] = {
+            "success": not failed,
+            "count": len(results),
+            "succeeded": list(dict.fromkeys(entity_id for entity_id, success, _ in results if success)),
+            "failed": failed,
+            "ts": int(time.time() * 1000)
+        }
+        errors = {str(entity_id): error for entity_id, success, error in results if not success and error}
+        if errors:
+            body["errors"] = errors
+
+        payload, headers = self._encode(ack_subject, body)
+        try:
+            await self.manager.publish(ack_subject, payload, headers=headers)
+            self.published += 1
+            self.bytes_published += len(payload)
+        except Exception as e:
+            self.publish_errors += 1
+            logger.error(f"Error publishing {ack_subject}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get ack batching counters"""
+        return {
+            "max_batch": self.max_batch,
+            "interval_ms": self.interval_ms,
+            "pending": sum(len(results) for results in self._pending.values()),
+            "recorded": self.recorded,
+            "published": self.published,
+            "avg_results_per_ack": round(self.recorded / self.published, 2) if self.published else 0.0,
+            "bytes_published": self.bytes_published,
+            "publish_errors": self.publish_errors,
+            "encodings": dict(self._encodings),
+            "msgpack_available": msgpack is not None
+        }
+
+
+ack_aggregator = AckAggregator()
+metrics_registry.register("sync_acks", ack_aggregator.get_stats)
@@ -0,0 +1,293 @@
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import os
+import random
+
+from nats.aio.msg import Msg
+
+from src.handlers.ack_aggregator import ack_aggregator
+from src.handlers.coalescer import EventCoalescer
+from src.handlers.dead_letter_store import dead_letter_store
+from src.handlers.dispatcher import KeyedDispatcher
+from src.handlers.nats_connection import nats_manager
+from src.handlers.retry_scheduler import RetryScheduler
+from src.handlers.sync_event import SyncEvent
+from src.managers.semantic_cache import semantic_response_cache
+from src.monitoring.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+UPSERT_ACTIONS = ("created", "updated")
+DELETE_ACTIONS = ("deleted",)
+
+PAYLOAD_LOG_SAMPLE_RATE = float(os.getenv("SYNC_PAYLOAD_LOG_SAMPLE_RATE", "0.01"))
+
+
+def log_payload(log: logging.Logger, subject: str, data: Any) -> None:
+    """Log a sample of received payloads at debug level"""
+    if log.isEnabledFor(logging.DEBUG) and random.random() < PAYLOAD_LOG_SAMPLE_RATE:
+        log.debug(f"Received {subject} message: {data}")
+
+
+class BaseSyncHandler(ABC):
+    """Dispatch and batch processing shared by the catalog sync handlers.
+
+    Subclasses set the entity name and the subject filter covering all of
+    their subjects, and implement the bulk upsert/delete calls plus
+    handle_event for actions that cannot be batched. Core NATS events are
+    debounced per id by an EventCoalescer, and work is sharded by entity id
+    on a KeyedDispatcher, so events for one id are applied in order while
+    different ids run concurrently. Failed events are retried with backoff
+    by a RetryScheduler and dead-lettered once they run out of attempts.
+    """
+
+    entity: str = ""
+    subject_filter: str = ""
+    dispatch_workers: Optional[int] = None
+    dispatch_queue_size: Optional[int] = None
+
+    def __init__(self):
+        self.nats = nats_manager
+        self.dispatcher = KeyedDispatcher(
+            self.entity,
+            workers=self.dispatch_workers,
+            queue_size=self.dispatch_queue_size
+        )
+        self.coalescer = EventCoalescer(self)
+        self.retries = RetryScheduler(self)
+        self.acks = ack_aggregator
+        self._message_handlers: Dict[str, Callable[[Msg], Awaitable[None]]] = {}
+        # Retries saved at the last shutdown resume once the connection is up
+        self.nats.add_connect_hook(self.retries.restore)
+        # Pending coalesced events and retries are settled before the dispatcher stops
+        self.nats.add_drain_hook(self.coalescer.stop)
+        self.nats.add_drain_hook(self.retries.stop)
+        self.nats.add_drain_hook(self.dispatcher.stop)
+        self.nats.add_drain_hook(self.acks.flush)
+        metrics_registry.register(f"{self.entity}_dispatcher", self.dispatcher.get_stats)
+        metrics_registry.register(f"{self.entity}_coalescer", self.coalescer.get_stats)
+        metrics_registry.register(f"{self.entity}_retries", self.retries.get_stats)
+
+    def route_messages(self, handlers: Dict[str, Callable[[Msg], Awaitable[None]]]) -> None:
+        """Subscribe the subject filter once and dispatch each action to its handler.
+
+        A single subscription keeps messages in the order they arrived on the
+        wire, which per-subject subscriptions do not guarantee.
+        """
+        self._message_handlers = handlers
+        self.nats.route(self.subject_filter, self.dispatch_message)
+
+    def message_key(self, msg: Msg) -> str:
+        """Entity id used to shard a message, falling back to its subject"""
+        try:
+            return self.parse_event(msg).entity_id or msg.subject
+        except ValueError:
+            return msg.subject
+
+    async def dispatch_message(self, msg: Msg) -> None:
+        """Coalesce a core NATS message, or queue it behind earlier messages for the same entity"""
+        handler = self._message_handlers.get(msg.subject.rsplit(".", 1)[-1])
+        if handler is None:
+            logger.warning(f"No handler for {msg.subject}, skipping")
+            return
+
+        if self.coalescer.enabled:
+            try:
+                await self.coalescer.add(self.parse_event(msg))
+                return
+            except ValueError:
+                # Let the per-message handler report the malformed payload
+                pass
+        await self.dispatcher.submit(self.message_key(msg), lambda: handler(msg))
+
+    def parse_event(self, msg: Msg) -> SyncEvent:
+        """Decode a message into a SyncEvent; raises ValueError if it is malformed"""
+        try:
+            data = json.loads(msg.data.decode())
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid JSON on {msg.subject}: {e}")
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected a JSON object on {msg.subject}")
+
+        action = msg.subject.rsplit(".", 1)[-1]
+        data = self.extract_payload(action, data)
+        return SyncEvent(
+            subject=msg.subject,
+            action=action,
+            entity_id=data.get("id"),
+            data=data,
+            msg=msg
+        )
+
+    def extract_payload(self, action: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Unwrap the entity payload from a message body"""
+        return data
+
+    def event_kind(self, event: SyncEvent) -> str:
+        """Classify an event as 'upsert', 'delete' or 'single'"""
+        if event.action in UPSERT_ACTIONS:
+            return "upsert"
+        if event.action in DELETE_ACTIONS:
+            return "delete"
+        return "single"
+
+    def merge_event(self, pending: SyncEvent, event: SyncEvent) -> Optional[SyncEvent]:
+        """Collapse event into the pending event for the same id, or None if both must be applied.
+
+        Creates and updates carry the full entity, so the latest one wins, and
+        a delete supersedes whatever is pending.
+        """
+        if self.event_kind(event) in ("upsert", "delete"):
+            return event
+        return None
+
+    @abstractmethod
+    async def upsert_batch(self, payloads: List[Dict[str, Any]]) -> bool:
+        """Create or update many entities in one bulk write"""
+
+    @abstractmethod
+    async def delete_batch(self, ids: List[str]) -> bool:
+        """Delete many entities in one bulk write"""
+
+    async def handle_event(self, event: SyncEvent) -> bool:
+        """Apply one event that has no bulk equivalent"""
+        logger.warning(f"No handler for {event.subject}, skipping")
+        return True
+
+    async def process_batch(self, events: List[SyncEvent]) -> List[bool]:
+        """Apply a batch of events with as few bulk writes as possible.
+
+        Consecutive upserts or deletes are grouped into one bulk call as long
+        as no id repeats inside the group, which keeps the per-id order of
+        operations intact. Returns one success flag per event.
+        """
+        results: List[bool] = [False] * len(events)
+        group: List[int] = []
+        group_kind: Optional[str] = None
+        group_ids: set = set()
+
+        async def apply(indexes: List[int]) -> bool:
+            try:
+                if group_kind == "upsert":
+                    return bool(await self.upsert_batch([events[i].data for i in indexes]))
+                return bool(await self.delete_batch([events[i].entity_id for i in indexes]))
+            except Exception as e:
+                logger.error(f"Bulk {group_kind} of {len(indexes)} {self.entity} events failed: {e}")
+                return False
+
+        async def flush():
+            if not group:
+                return
+            if await apply(group):
+                for i in group:
+                    results[i] = True
+            elif len(group) > 1:
+                # Retry one by one so a single bad payload does not fail the whole group
+                for i in group:
+                    results[i] = await apply([i])
+            group.clear()
+            group_ids.clear()
+
+        for index, event in enumerate(events):
+            kind = self.event_kind(event)
+            if not event.entity_id and kind != "single":
+                logger.error(f"No {self.entity} ID in {event.subject} message")
+                # Nothing to retry; treat as handled like the per-message path does
+                results[index] = True
+                continue
+
+            if kind == "single":
+                await flush()
+                try:
+                    results[index] = bool(await self.handle_event(event))
+                except Exception as e:
+                    logger.error(f"Error handling {event.subject}: {e}")
+                continue
+
+            if kind != group_kind or event.entity_id in group_ids:
+                await flush()
+                group_kind = kind
+            group.append(index)
+            group_ids.add(event.entity_id)
+
+        await flush()
+        return results
+
+    async def process_batch_sharded(self, events: List[SyncEvent]) -> List[bool]:
+        """Split a batch by dispatcher shard and process the parts concurrently"""
+        shards: Dict[int, List[int]] = {}
+        for index, event in enumerate(events):
+            shard = self.dispatcher.shard_for(event.entity_id or event.subject)
+            shards.setdefault(shard, []).append(index)
+
+        futures = []
+        for indexes in shards.values():
+            part = [events[i] for i in indexes]
+            futures.append(await self.dispatcher.submit(
+                part[0].entity_id or part[0].subject,
+                lambda part=part: self.process_batch(part)
+            ))
+
+        results: List[bool] = [False] * len(events)
+        for indexes, part_results in zip(shards.values(), await asyncio.gather(*futures)):
+            for i, success in zip(indexes, part_results or []):
+                results[i] = success
+        return results
+
+    async def settle(self, events: List[SyncEvent], results: List[bool]) -> None:
+        """Ack applied events and hand failed ones to the retry scheduler"""
+        for event, success in zip(events, results):
+            if success:
+                # A full create/update/delete makes an older failed retry obsolete
+                if self.event_kind(event) != "single":
+                    await self.retries.discard(event.entity_id, applied=event)
+                for source in event.sources():
+                    await self.record_ack(source, True)
+            else:
+                await self.retries.schedule(event)
+        await self.acks.flush()
+
+    async def invalidate_responses(self, data: Optional[Dict[str, Any]] = None) -> None:
+        """Drop cached chat replies built from this entity, per user when the payload names one"""
+        user_id = data.get('user_id') if isinstance(data, dict) else None
+        semantic_response_cache.invalidate(self.entity, user_id=user_id)
+
+    async def record_ack(self, event: SyncEvent, success: bool) -> None:
+        """Add the result of one event to the next batched ack"""
+        if success:
+            await self.invalidate_responses(event.data)
+        error = None if success else f"Failed to apply {event.subject}"
+        await self.acks.record(event.subject, event.entity_id, success, error=error, msg=event.msg)
+
+    async def ack_message(
+        self,
+        msg: Msg,
+        success: bool,
+        entity_id: Optional[str] = None,
+        error: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Add the result of one core NATS message to the next batched ack.
+
+        data is the applied payload; it scopes which cached replies are
+        dropped. Failed messages are not acked yet: they are retried later
+        and acked once they succeed or are dead-lettered.
+        """
+        action = msg.subject.rsplit(".", 1)[-1]
+        if success:
+            if action in UPSERT_ACTIONS or action in DELETE_ACTIONS:
+                await self.retries.discard(entity_id)
+            await self.invalidate_responses(data)
+            await self.acks.record(msg.subject, entity_id, success, error=error, msg=msg)
+            return
+
+        try:
+            event = self.parse_event(msg)
+        except ValueError as e:
+            await dead_letter_store.add_malformed(self.entity, msg.subject, msg.data, str(e))
+            await self.acks.record(msg.subject, entity_id, False, error=error or str(e), msg=msg)
+            return
+        await self.retries.schedule(event, error)
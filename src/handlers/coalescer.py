@@ -0,0 +1,127 @@
+from typing import Dict, List, Any, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+
+from src.handlers.sync_event import SyncEvent
+
+logger = logging.getLogger(__name__)
+
+
+def merge_into(handler: Any, chains: Dict[Any, List[SyncEvent]], event: SyncEvent) -> bool:
+    """Add event to the pending chain for its id; returns True if it was collapsed.
+
+    The handler's merge_event decides whether the event can be folded into
+    the last pending event for the same id. Events that cannot be merged
+    are queued after it so their relative order is kept.
+    """
+    # Events without an id never merge with anything
+    key = event.entity_id or id(event)
+    chain = chains.setdefault(key, [])
+    if chain:
+        pending = chain[-1]
+        merged = handler.merge_event(pending, event)
+        if merged is not None:
+            if merged is pending or merged is event:
+                superseded = event if merged is pending else pending
+            else:
+                superseded = event if merged.msg is pending.msg else pending
+            merged.coalesced = pending.coalesced + event.coalesced + [superseded]
+            chain[-1] = merged
+            return True
+    chain.append(event)
+    return False
+
+
+def coalesce_events(handler: Any, events: List[SyncEvent]) -> Tuple[List[SyncEvent], int]:
+    """Collapse a batch of events per id; returns the events to apply and how many were collapsed"""
+    chains: Dict[Any, List[SyncEvent]] = {}
+    coalesced = sum(merge_into(handler, chains, event) for event in events)
+    return [event for chain in chains.values() for event in chain], coalesced
+
+
+class EventCoalescer:
+    """Debounces sync events per entity id before they are applied.
+
+    Events are held for up to window_ms. Within that window a newer payload
+    replaces the pending one for the same id, and a delete cancels pending
+    updates. The surviving events are then applied as one batch through the
+    handler's bulk path, and every original message is acknowledged with the
+    result of the event it was collapsed into once it has been settled.
+    """
+
+    def __init__(self, handler: Any, window_ms: Optional[float] = None, max_pending: Optional[int] = None):
+        self.handler = handler
+        prefix = handler.entity.upper()
+        self.window_ms = window_ms if window_ms is not None else float(
+            os.getenv(f"{prefix}_SYNC_COALESCE_WINDOW_MS", os.getenv("SYNC_COALESCE_WINDOW_MS", "200"))
+        )
+        self.max_pending = max_pending or int(os.getenv("SYNC_COALESCE_MAX_PENDING", "500"))
+        self._chains: Dict[Any, List[SyncEvent]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        # Flushes are applied one at a time so per-id order holds across windows
+        self._flush_lock = asyncio.Lock()
+
+        self.received = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.flushed_events = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0
+
+    @property
+    def pending(self) -> int:
+        return sum(len(chain) for chain in self._chains.values())
+
+    async def add(self, event: SyncEvent) -> None:
+        """Queue an event; waits for a flush when too many events are pending"""
+        self.received += 1
+        if merge_into(self.handler, self._chains, event):
+            self.coalesced += 1
+
+        if self.pending >= self.max_pending:
+            await self._flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush_in_background)
+
+    def _flush_in_background(self) -> None:
+        task = asyncio.get_running_loop().create_task(self._flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        chains, self._chains = self._chains, {}
+        events = [event for chain in chains.values() for event in chain]
+        if not events:
+            return
+
+        async with self._flush_lock:
+            self.flushes += 1
+            self.flushed_events += len(events)
+            results = await self.handler.process_batch_sharded(events)
+            await self.handler.settle(events, results)
+
+    async def stop(self) -> None:
+        """Flush pending events and wait for in-flight flushes"""
+        await self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        return {
+            "window_ms": self.window_ms,
+            "pending": self.pending,
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "flushed_events": self.flushed_events,
+            "avg_flush_size": round(self.flushed_events / self.flushes, 2) if self.flushes else 0.0
+        }
@@ -0,0 +1,291 @@
+"""
+Persistent dead-letter store for sync events that kept failing
+
+Events that exhaust their retries are written to a local SQLite file so they
+are not lost. The replay command applies them again through the owning sync
+handler's bulk path once the underlying problem is fixed. Retries still
+waiting at shutdown are saved to a separate table in the same file and
+resumed on the next start.
+
+Usage:
+    python -m src.handlers.dead_letter_store list [--entity variant] [--limit 50]
+    python -m src.handlers.dead_letter_store replay [--entity variant] [--limit 500]
+    python -m src.handlers.dead_letter_store purge [--all]
+"""
+
+from typing import Dict, List, Any, Optional
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from src.handlers.sync_event import SyncEvent
+from src.monitoring.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Action recorded for messages that could not be decoded; these are kept for
+# inspection but never replayed
+MALFORMED = "malformed"
+
+# Module path of the handler singleton that owns each entity
+HANDLERS = {
+    "product": "src.handlers.product_sync_handler:product_sync_handler",
+    "variant": "src.handlers.variant_sync_handler:variant_sync_handler",
+    "promotion": "src.handlers.promotion_sync_handler:promotion_sync_handler",
+    "order": "src.handlers.order_sync_handler:order_sync_handler"
+}
+
+
+class DeadLetterStore:
+    """SQLite-backed store of sync events that could not be applied"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("SYNC_DEAD_LETTER_PATH", "./data/sync_dead_letters.db")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.added = 0
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS dead_letters ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "entity TEXT NOT NULL, subject TEXT NOT NULL, action TEXT NOT NULL, "
+                "entity_id TEXT, payload TEXT NOT NULL, error TEXT, attempts INTEGER NOT NULL, "
+                "failed_at REAL NOT NULL, replayed_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pending_retries ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "entity TEXT NOT NULL, subject TEXT NOT NULL, action TEXT NOT NULL, "
+                "entity_id TEXT, payload TEXT NOT NULL, attempts INTEGER NOT NULL, saved_at REAL NOT NULL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def _add(self, entity: str, event: SyncEvent, error: Optional[str], attempts: int) -> None:
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                "INSERT INTO dead_letters (entity, subject, action, entity_id, payload, error, attempts, failed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entity, event.subject, event.action, event.entity_id,
+                 json.dumps(event.data, default=str), error, attempts, time.time())
+            )
+            connection.commit()
+
+    async def add(self, entity: str, event: SyncEvent, error: Optional[str], attempts: int) -> None:
+        """Persist a failed event without blocking the event loop"""
+        try:
+            await asyncio.to_thread(self._add, entity, event, error, attempts)
+        except sqlite3.Error as e:
+            logger.error(f"Could not dead-letter {event.subject} for {entity} {event.entity_id}: {e}")
+            return
+        self.added += 1
+        logger.warning(f"Dead-lettered {event.subject} for {entity} {event.entity_id} after {attempts} attempts: {error}")
+
+    async def add_malformed(self, entity: str, subject: str, raw: bytes, error: str) -> None:
+        """Keep an undecodable message for inspection"""
+        event = SyncEvent(
+            subject=subject,
+            action=MALFORMED,
+            entity_id=None,
+            data={"raw": raw.decode("utf-8", errors="replace")}
+        )
+        await self.add(entity, event, error, attempts=1)
+
+    def _save_pending(self, entity: str, events: List[SyncEvent]) -> None:
+        with self._lock:
+            connection = self._get_connection()
+            connection.executemany(
+                "INSERT INTO pending_retries (entity, subject, action, entity_id, payload, attempts, saved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (entity, event.subject, event.action, event.entity_id,
+                     json.dumps(event.data, default=str), event.attempts, time.time())
+                    for event in events
+                ]
+            )
+            connection.commit()
+
+    async def save_pending(self, entity: str, events: List[SyncEvent]) -> None:
+        """Persist retries that were still waiting at shutdown, in order"""
+        if not events:
+            return
+        await asyncio.to_thread(self._save_pending, entity, events)
+        logger.info(f"Saved {len(events)} pending {entity} retries for the next start")
+
+    def _take_pending(self, entity: str) -> List[SyncEvent]:
+        if self._connection is None and not os.path.exists(self.path):
+            return []
+        with self._lock:
+            connection = self._get_connection()
+            rows = connection.execute(
+                "SELECT * FROM pending_retries WHERE entity = ? ORDER BY id", (entity,)
+            ).fetchall()
+            connection.execute("DELETE FROM pending_retries WHERE entity = ?", (entity,))
+            connection.commit()
+        return [
+            SyncEvent(
+                subject=row["subject"],
+                action=row["action"],
+                entity_id=row["entity_id"],
+                data=json.loads(row["payload"]),
+                attempts=row["attempts"]
+            )
+            for row in rows
+        ]
+
+    async def take_pending(self, entity: str) -> List[SyncEvent]:
+        """Remove and return the retries saved for an entity, oldest first"""
+        return await asyncio.to_thread(self._take_pending, entity)
+
+    def list_events(
+        self,
+        entity: Optional[str] = None,
+        limit: int = 50,
+        include_replayed: bool = False,
+        replayable_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get dead letters, oldest first"""
+        query = "SELECT * FROM dead_letters WHERE 1 = 1"
+        params: List[Any] = []
+        if replayable_only:
+            query += " AND action != ?"
+            params.append(MALFORMED)
+        if entity:
+            query += " AND entity = ?"
+            params.append(entity)
+        if not include_replayed:
+            query += " AND replayed_at IS NULL"
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._get_connection().execute(query, params).fetchall()]
+
+    def mark_replayed(self, ids: List[int]) -> None:
+        with self._lock:
+            connection = self._get_connection()
+            connection.executemany(
+                "UPDATE dead_letters SET replayed_at = ? WHERE id = ?",
+                [(time.time(), row_id) for row_id in ids]
+            )
+            connection.commit()
+
+    def mark_failed(self, ids: List[int], error: str) -> None:
+        with self._lock:
+            connection = self._get_connection()
+            connection.executemany(
+                "UPDATE dead_letters SET attempts = attempts + 1, error = ?, failed_at = ? WHERE id = ?",
+                [(error, time.time(), row_id) for row_id in ids]
+            )
+            connection.commit()
+
+    def purge(self, replayed_only: bool = True) -> int:
+        """Delete replayed (or all) dead letters; returns the number removed"""
+        query = "DELETE FROM dead_letters" + (" WHERE replayed_at IS NOT NULL" if replayed_only else "")
+        with self._lock:
+            connection = self._get_connection()
+            removed = connection.execute(query).rowcount
+            connection.commit()
+        return removed
+
+    def count(self) -> int:
+        """Number of dead letters waiting for replay"""
+        if self._connection is None and not os.path.exists(self.path):
+            return 0
+        with self._lock:
+            return self._get_connection().execute(
+                "SELECT COUNT(*) FROM dead_letters WHERE replayed_at IS NULL"
+            ).fetchone()[0]
+
+    def pending_count(self) -> int:
+        """Number of retries saved at shutdown and not resumed yet"""
+        if self._connection is None and not os.path.exists(self.path):
+            return 0
+        with self._lock:
+            return self._get_connection().execute("SELECT COUNT(*) FROM pending_retries").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get dead letter counters"""
+        return {
+            "path": self.path,
+            "added": self.added,
+            "waiting": self.count(),
+            "pending_retries": self.pending_count()
+        }
+
+
+def _load_handler(entity: str):
+    module_name, attribute = HANDLERS[entity].split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+async def replay(store: DeadLetterStore, entity: Optional[str] = None, limit: int = 500) -> Dict[str, int]:
+    """Apply dead letters again through their handler's bulk path"""
+    summary = {"replayed": 0, "failed": 0}
+    rows = store.list_events(entity=entity, limit=limit, replayable_only=True)
+    by_entity: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_entity.setdefault(row["entity"], []).append(row)
+
+    for row_entity, entity_rows in by_entity.items():
+        handler = _load_handler(row_entity)
+        events = [
+            SyncEvent(
+                subject=row["subject"],
+                action=row["action"],
+                entity_id=row["entity_id"],
+                data=json.loads(row["payload"])
+            )
+            for row in entity_rows
+        ]
+        results = await handler.process_batch(events)
+        succeeded = [row["id"] for row, success in zip(entity_rows, results) if success]
+        failed = [row["id"] for row, success in zip(entity_rows, results) if not success]
+        store.mark_replayed(succeeded)
+        if failed:
+            store.mark_failed(failed, "Replay failed")
+        summary["replayed"] += len(succeeded)
+        summary["failed"] += len(failed)
+        logger.info(f"{row_entity}: replayed {len(succeeded)}, failed {len(failed)}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay dead-lettered sync events")
+    parser.add_argument("command", choices=["list", "replay", "purge"])
+    parser.add_argument("--entity", choices=list(HANDLERS))
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--path", default=None, help="Dead letter database (SYNC_DEAD_LETTER_PATH)")
+    parser.add_argument("--all", action="store_true", help="purge: also delete events that were never replayed")
+    args = parser.parse_args()
+
+    store = DeadLetterStore(args.path)
+    if args.command == "list":
+        for row in store.list_events(entity=args.entity, limit=args.limit or 50):
+            print(json.dumps(row, default=str))
+    elif args.command == "replay":
+        print(json.dumps(asyncio.run(replay(store, entity=args.entity, limit=args.limit or 500))))
+    else:
+        print(json.dumps({"removed": store.purge(replayed_only=not args.all)}))
+
+
+dead_letter_store = DeadLetterStore()
+# Counts come from SQLite, so they are collected off the event loop
+metrics_registry.register("sync_dead_letters", dead_letter_store.get_stats, blocking=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,107 @@
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Tuple
+import asyncio
+import logging
+import os
+import time
+import zlib
+
+from src.monitoring.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class KeyedDispatcher:
+    """Runs jobs on K worker queues sharded by entity id.
+
+    Jobs for the same key always land on the same queue and run one after
+    another in submission order, while different keys run in parallel on the
+    other workers. Queues are bounded, so submit() waits when a shard is full
+    and the backpressure reaches the caller.
+    """
+
+    def __init__(self, name: str, workers: Optional[int] = None, queue_size: Optional[int] = None):
+        self.name = name
+        prefix = name.upper()
+        self.workers = workers or int(os.getenv(f"{prefix}_SYNC_WORKERS", os.getenv("SYNC_WORKERS", "4")))
+        self.queue_size = queue_size or int(os.getenv(f"{prefix}_SYNC_QUEUE_SIZE", os.getenv("SYNC_QUEUE_SIZE", "1000")))
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.processed = 0
+        self.errors = 0
+        self.blocked = 0
+        self.queue_wait = LatencyHistogram()
+
+    def shard_for(self, key: Any) -> int:
+        """Stable shard index for a key"""
+        return zlib.crc32(str(key).encode("utf-8")) % self.workers
+
+    def _start(self) -> None:
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._worker(queue), name=f"{self.name}-dispatch-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+        logger.info(f"Started {self.name} dispatcher with {self.workers} workers")
+
+    async def submit(self, key: Any, job: Job) -> "asyncio.Future":
+        """Queue a job behind earlier jobs for the same key.
+
+        Waits while the shard queue is full. The returned future resolves to
+        the job result, or None if the job raised.
+        """
+        if not self._tasks:
+            self._start()
+        queue = self._queues[self.shard_for(key)]
+        if queue.full():
+            self.blocked += 1
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((job, future, time.perf_counter()))
+        self.submitted += 1
+        return future
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            job, future, submitted_at = await queue.get()
+            self.queue_wait.observe((time.perf_counter() - submitted_at) * 1000)
+            result = None
+            try:
+                result = await job()
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error in {self.name} dispatch job: {e}")
+            finally:
+                if not future.done():
+                    future.set_result(result)
+                queue.task_done()
+
+    async def stop(self) -> None:
+        """Wait for queued jobs to finish and stop the workers"""
+        if not self._tasks:
+            return
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._queues.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth gauges and throughput counters"""
+        depths = [queue.qsize() for queue in self._queues]
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": sum(depths),
+            "shard_depths": depths,
+            "max_shard_depth": max(depths) if depths else 0,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "errors": self.errors,
+            "blocked_submits": self.blocked,
+            "queue_wait": self.queue_wait.snapshot()
+        }
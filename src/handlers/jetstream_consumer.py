@@ -0,0 +1,207 @@
+from typing import Dict, List, Any, Optional
+import asyncio
+import logging
+import time
+
+from nats.errors import TimeoutError as NatsTimeoutError
+from nats.js.api import AckPolicy, ConsumerConfig, DeliverPolicy
+from nats.js.errors import NotFoundError
+
+from src.handlers.base_sync_handler import BaseSyncHandler, SyncEvent
+from src.handlers.coalescer import coalesce_events
+from src.handlers.dead_letter_store import dead_letter_store
+from src.handlers.nats_connection import NatsConnectionManager, nats_manager
+from src.core.backoff import backoff_delay
+from src.monitoring.metrics import LatencyHistogram, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class JetStreamConsumer:
+    """Durable pull consumers feeding sync handlers in batches.
+
+    Each registered handler gets a durable consumer filtered on its subject.
+    Messages are fetched in batches, decoded, applied through the handler's
+    bulk path and then acked or nak'd one by one, which gives at-least-once
+    delivery across restarts. Naks back off exponentially with the delivery
+    count, and the last delivery is dead-lettered instead of being dropped.
+    """
+
+    def __init__(self, manager: NatsConnectionManager = nats_manager):
+        self.manager = manager
+        self.config = manager.config
+        self._handlers: Dict[str, BaseSyncHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._subscriptions: List[Any] = []
+        self._running = False
+
+        self.fetched = 0
+        self.acked = 0
+        self.naked = 0
+        self.terminated = 0
+        self.dead_lettered = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batch_latency = LatencyHistogram()
+
+    def register(self, handler: BaseSyncHandler) -> None:
+        """Consume the handler's JetStream subject once start() is called"""
+        self._handlers[handler.subject_filter] = handler
+
+    async def _ensure_stream(self, js) -> None:
+        """Create the sync stream if it does not exist yet"""
+        try:
+            info = await js.stream_info(self.config.stream_name)
+            missing = set(self.config.stream_subjects) - set(info.config.subjects or [])
+            if missing:
+                logger.warning(f"Stream {self.config.stream_name} does not capture subjects {sorted(missing)}")
+        except NotFoundError:
+            await js.add_stream(name=self.config.stream_name, subjects=self.config.stream_subjects)
+            logger.info(f"Created JetStream stream {self.config.stream_name} for {self.config.stream_subjects}")
+
+    def _durable_name(self, subject: str) -> str:
+        return f"{self.config.durable_prefix}-{subject.split('.', 1)[0]}"
+
+    async def start(self) -> None:
+        """Bind one durable pull consumer per registered handler and start fetching"""
+        if not self._handlers or self._running:
+            return
+
+        js = self.manager.nc.jetstream()
+        await self._ensure_stream(js)
+
+        self._running = True
+        for subject, handler in self._handlers.items():
+            durable = self._durable_name(subject)
+            subscription = await js.pull_subscribe(
+                subject,
+                durable=durable,
+                stream=self.config.stream_name,
+                config=ConsumerConfig(
+                    durable_name=durable,
+                    ack_policy=AckPolicy.EXPLICIT,
+                    deliver_policy=DeliverPolicy.ALL,
+                    ack_wait=self.config.ack_wait,
+                    max_deliver=self.config.max_deliver,
+                    max_ack_pending=self.config.fetch_batch_size * 10
+                )
+            )
+            self._subscriptions.append(subscription)
+            self._tasks.append(asyncio.create_task(self._consume(subscription, handler)))
+            logger.info(f"Consuming {subject} with durable consumer {durable}")
+
+    async def _consume(self, subscription, handler: BaseSyncHandler) -> None:
+        """Fetch, apply and ack batches until stopped"""
+        while self._running:
+            try:
+                messages = await subscription.fetch(
+                    batch=self.config.fetch_batch_size,
+                    timeout=self.config.fetch_timeout
+                )
+            except (NatsTimeoutError, asyncio.TimeoutError):
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error fetching {handler.subject_filter}: {e}")
+                await asyncio.sleep(self.config.fetch_timeout)
+                continue
+
+            if messages:
+                await self._process(messages, handler)
+
+    async def _process(self, messages, handler: BaseSyncHandler) -> None:
+        """Apply one fetched batch and settle every message"""
+        started_at = time.perf_counter()
+        self.fetched += len(messages)
+        self.batches += 1
+
+        events: List[SyncEvent] = []
+        for msg in messages:
+            try:
+                events.append(handler.parse_event(msg))
+            except ValueError as e:
+                # Malformed messages would fail on every redelivery
+                logger.error(f"Dead-lettering malformed message: {e}")
+                await dead_letter_store.add_malformed(handler.entity, msg.subject, msg.data, str(e))
+                await msg.term()
+                self.terminated += 1
+                self.dead_lettered += 1
+
+        # Only the latest event per id in the fetch is applied
+        events, coalesced = coalesce_events(handler, events)
+        self.coalesced += coalesced
+        results = await handler.process_batch_sharded(events) if events else []
+
+        for event, success in zip(events, results):
+            try:
+                await self._settle(event, success, handler)
+            except Exception as e:
+                logger.error(f"Error settling {event.subject} message: {e}")
+        await handler.acks.flush()
+
+        self.batch_latency.observe((time.perf_counter() - started_at) * 1000)
+
+    async def _settle(self, event: SyncEvent, success: bool, handler: BaseSyncHandler) -> None:
+        """Ack an applied event, or nak it with backoff until its last delivery"""
+        sources = event.sources()
+        if success:
+            for source in sources:
+                await source.msg.ack()
+                self.acked += 1
+                await handler.record_ack(source, True)
+            return
+
+        delivered = max(source.msg.metadata.num_delivered for source in sources)
+        if delivered < self.config.max_deliver:
+            delay = backoff_delay(delivered, self.config.nak_delay, self.config.nak_max_delay)
+            for source in sources:
+                await source.msg.nak(delay=delay)
+                self.naked += 1
+            return
+
+        # The server will not redeliver again, so keep the event locally
+        event.attempts = delivered
+        await dead_letter_store.add(handler.entity, event, f"Failed to apply {event.subject}", delivered)
+        self.dead_lettered += 1
+        for source in sources:
+            await source.msg.term()
+            self.terminated += 1
+            await handler.record_ack(source, False)
+
+    async def stop(self) -> None:
+        """Finish the batch in progress and stop fetching"""
+        if not self._running:
+            return
+        self._running = False
+        # Fetches return within fetch_timeout, so the loops exit on their own
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for subscription in self._subscriptions:
+            try:
+                await subscription.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Error unsubscribing pull consumer: {e}")
+        self._subscriptions.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get consumer throughput counters"""
+        return {
+            "enabled": self.config.jetstream_enabled,
+            "running": self._running,
+            "stream": self.config.stream_name,
+            "subjects": sorted(self._handlers),
+            "fetched": self.fetched,
+            "acked": self.acked,
+            "naked": self.naked,
+            "terminated": self.terminated,
+            "dead_lettered": self.dead_lettered,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "avg_batch_size": round(self.fetched / self.batches, 2) if self.batches else 0.0,
+            "batch_latency": self.batch_latency.snapshot()
+        }
+
+
+jetstream_consumer = JetStreamConsumer()
+metrics_registry.register("jetstream", jetstream_consumer.get_stats)
@@ -0,0 +1,159 @@
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+import asyncio
+import functools
+import logging
+import time
+
+from nats.aio.client import Client as NATS
+from nats.aio.msg import Msg
+
+from src.config.nats_config import NatsConfig
+from src.monitoring.metrics import LatencyHistogram, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[Msg], Awaitable[None]]
+
+
+class NatsConnectionManager:
+    """Owns the single NATS client shared by every sync handler.
+
+    Handlers register subject routes (wildcards allowed) before startup;
+    connect() opens one connection, subscribes every route and dispatches
+    incoming messages to the registered coroutine. Reconnects follow one
+    policy from NatsConfig and shutdown drains in-flight messages before
+    closing.
+    """
+
+    def __init__(self, config: Optional[NatsConfig] = None):
+        self.config = config or NatsConfig()
+        self.nc = NATS()
+        self._routes: Dict[str, MessageHandler] = {}
+        self._subscriptions: Dict[str, Any] = {}
+        self._drain_hooks: List[Callable[[], Awaitable[None]]] = []
+        self._connect_hooks: List[Callable[[], Awaitable[None]]] = []
+        self._connect_lock = asyncio.Lock()
+
+        self.messages: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.reconnects = 0
+        self.disconnects = 0
+        self.handler_latency = LatencyHistogram()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.nc.is_connected
+
+    def route(self, subject: str, handler: MessageHandler) -> None:
+        """Register the coroutine that handles messages on a subject"""
+        if subject in self._routes and self._routes[subject] is not handler:
+            raise ValueError(f"Subject {subject} already has a handler")
+        self._routes[subject] = handler
+
+    def add_connect_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Run hook after connecting, once every route is subscribed"""
+        self._connect_hooks.append(hook)
+
+    def add_drain_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Run hook on shutdown after subscriptions stop and before the connection closes"""
+        self._drain_hooks.append(hook)
+
+    async def connect(self) -> None:
+        """Open the shared connection once and subscribe every registered route"""
+        async with self._connect_lock:
+            if not self.nc.is_connected:
+                await self.nc.connect(
+                    servers=self.config.servers,
+                    name=self.config.name,
+                    user=self.config.user,
+                    password=self.config.password,
+                    max_reconnect_attempts=self.config.max_reconnect_attempts,
+                    reconnect_time_wait=self.config.reconnect_time_wait,
+                    connect_timeout=self.config.connect_timeout,
+                    drain_timeout=self.config.drain_timeout,
+                    error_cb=self._on_error,
+                    disconnected_cb=self._on_disconnected,
+                    reconnected_cb=self._on_reconnected,
+                    closed_cb=self._on_closed
+                )
+                logger.info(f"Connected to NATS at {self.nc.connected_url.netloc if self.nc.connected_url else self.config.servers}")
+
+            for subject in self._routes:
+                if subject not in self._subscriptions:
+                    self._subscriptions[subject] = await self.nc.subscribe(
+                        subject,
+                        cb=functools.partial(self._dispatch, subject)
+                    )
+            logger.info(f"Subscribed to {len(self._subscriptions)} NATS subjects")
+
+            for hook in self._connect_hooks:
+                await hook()
+
+    async def _dispatch(self, route: str, msg: Msg) -> None:
+        """Run the handler registered for the subscription route"""
+        handler = self._routes.get(route)
+        if handler is None:
+            logger.warning(f"No handler registered for subject {msg.subject}")
+            return
+
+        self.messages[msg.subject] = self.messages.get(msg.subject, 0) + 1
+        started_at = time.perf_counter()
+        try:
+            await handler(msg)
+        except Exception as e:
+            self.errors[msg.subject] = self.errors.get(msg.subject, 0) + 1
+            logger.error(f"Unhandled error in handler for {msg.subject}: {e}")
+        finally:
+            self.handler_latency.observe((time.perf_counter() - started_at) * 1000)
+
+    async def publish(self, subject: str, payload: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        """Publish on the shared connection"""
+        await self.nc.publish(subject, payload, headers=headers)
+
+    async def drain(self) -> None:
+        """Stop receiving, let in-flight handlers finish and close the connection"""
+        if self.nc.is_closed or not (self.nc.is_connected or self.nc.is_reconnecting):
+            return
+        try:
+            for subscription in self._subscriptions.values():
+                await subscription.drain()
+            for hook in self._drain_hooks:
+                await hook()
+            await self.nc.drain()
+            logger.info("NATS connection drained")
+        except Exception as e:
+            logger.error(f"Error draining NATS connection: {e}")
+            await self.nc.close()
+        finally:
+            self._subscriptions.clear()
+
+    async def _on_error(self, e: Exception) -> None:
+        logger.error(f"NATS error: {e}")
+
+    async def _on_disconnected(self) -> None:
+        self.disconnects += 1
+        logger.warning("Disconnected from NATS")
+
+    async def _on_reconnected(self) -> None:
+        self.reconnects += 1
+        logger.info(f"Reconnected to NATS at {self.nc.connected_url.netloc if self.nc.connected_url else ''}")
+
+    async def _on_closed(self) -> None:
+        logger.info("NATS connection closed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection state and per-subject message counters"""
+        return {
+            "connected": self.nc.is_connected,
+            "reconnecting": self.nc.is_reconnecting,
+            "subjects": sorted(self._routes),
+            "messages": dict(self.messages),
+            "errors": dict(self.errors),
+            "disconnects": self.disconnects,
+            "reconnects": self.reconnects,
+            "handler_latency": self.handler_latency.snapshot()
+        }
+
+
+nats_manager = NatsConnectionManager()
+metrics_registry.register("nats", nats_manager.get_stats)
@@ -1,150 +1,160 @@
-from typing import Dict, Any
+from typing import Dict, List, Any, Optional
+from dataclasses import replace
 import json
 import logging
 import asyncio
-from nats.aio.client import Client as NATS
-from datetime import datetime
 import os
 import dotenv
 from src.services.order_service import OrderService
+from src.managers.semantic_cache import semantic_response_cache
+from src.handlers.base_sync_handler import BaseSyncHandler, SyncEvent, log_payload
+from src.handlers.jetstream_consumer import jetstream_consumer
 
 # Load environment variables
 dotenv.load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class OrderSyncHandler:
+class OrderSyncHandler(BaseSyncHandler):
+    entity = "order"
+    subject_filter = "order.*"
+
     def __init__(self):
+        super().__init__()
         self.order_service = OrderService()
-        self.nats = NATS()
+        # Owners of orders being deleted, read before the delete removes them
+        self._deleted_owners: Dict[str, str] = {}
         
     async def initialize(self):
-        """Initialize NATS connection and subscriptions."""
+        """Register subject routes on the shared NATS connection."""
         try:
-            await self.nats.connect(
-                servers=[os.getenv("NATS_SERVER_URL", "nats://localhost:4222")],
-                user=os.getenv("NATS_USER"),
-                password=os.getenv("NATS_PASSWORD"),
-                max_reconnect_attempts=5,
-                reconnect_time_wait=1
-            )
-            
+            if self.nats.config.jetstream_enabled:
+                jetstream_consumer.register(self)
+                logger.info("Order sync handler registered for JetStream")
+                return
+
             # Subscribe to different order sync channels
-            await self.nats.subscribe(
-                "order.created",
-                cb=self.handle_order_created
-            )
-            await self.nats.subscribe(
-                "order.updated",
-                cb=self.handle_order_updated
-            )
-            await self.nats.subscribe(
-                "order.deleted",
-                cb=self.handle_order_deleted
-            )
-            await self.nats.subscribe(
-                "order.status_changed",
-                cb=self.handle_order_status_changed
-            )
+            self.route_messages({
+                "created": self.handle_order_created,
+                "updated": self.handle_order_updated,
+                "deleted": self.handle_order_deleted,
+                "status_changed": self.handle_order_status_changed
+            })
             
             logger.info("Order sync handler initialized with all channels")
             
         except Exception as e:
             logger.error(f"Error initializing order sync handler: {e}")
             raise
+
+    def extract_payload(self, action: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Creation events wrap the order in a 'result' envelope
+        return data.get('result', {}) if action == "created" else data
+
+    def merge_event(self, pending: SyncEvent, event: SyncEvent) -> Optional[SyncEvent]:
+        if event.action == "status_changed":
+            status_data = event.data.get('status_data') or {}
+            if self.event_kind(pending) == "upsert":
+                # Fold the new status into the pending full payload
+                return replace(pending, data={**pending.data, **status_data, 'status': event.data.get('status')})
+            if pending.action == "status_changed":
+                merged_status_data = {**(pending.data.get('status_data') or {}), **status_data}
+                return replace(event, data={**event.data, 'status_data': merged_status_data})
+            if pending.action == "deleted":
+                return pending
+        return super().merge_event(pending, event)
+
+    async def upsert_batch(self, payloads: List[Dict[str, Any]]) -> bool:
+        return await self.order_service.upsert_orders(payloads)
+
+    async def delete_batch(self, ids: List[str]) -> bool:
+        self._deleted_owners.update(await self.lookup_owners(ids))
+        if await self.order_service.delete_orders(ids):
+            return True
+        for id in ids:
+            self._deleted_owners.pop(id, None)
+        return False
+
+    async def handle_event(self, event: SyncEvent) -> bool:
+        if event.action == "status_changed":
+            return await self.order_service.update_order_status(
+                id=event.entity_id,
+                status=event.data.get('status'),
+                status_data=event.data.get('status_data', {})
+            )
+        return await super().handle_event(event)
             
+    async def lookup_owners(self, ids: List[str]) -> Dict[str, str]:
+        """user_id of each stored order, for scoping reply invalidation"""
+        ids = [id for id in ids if id]
+        if not semantic_response_cache.enabled or not ids:
+            return {}
+        try:
+            metadatas = await self.order_service.chroma_service.get_metadata_many(ids)
+        except Exception as e:
+            logger.warning(f"Could not look up owners of orders {ids}: {e}")
+            return {}
+        return {id: metadata['user_id'] for id, metadata in metadatas.items() if metadata.get('user_id')}
+
+    async def invalidate_responses(self, data: Optional[Dict[str, Any]] = None) -> None:
+        """Status changes and deletes name only the order, so find its owner"""
+        if isinstance(data, dict) and not data.get('user_id') and data.get('id'):
+            # Deleted orders are gone from Chroma; their owner was recorded before the delete
+            user_id = self._deleted_owners.pop(data['id'], None)
+            if user_id is None:
+                user_id = (await self.lookup_owners([data['id']])).get(data['id'])
+            if user_id is not None:
+                data = {**data, 'user_id': user_id}
+        await super().invalidate_responses(data)
+
     async def handle_order_created(self, msg):
         """Handle order creation messages."""
         try:
             data = json.loads(msg.data.decode()).get('result', {})
-            logger.info(f"Received order creation message: {data}")
+            log_payload(logger, msg.subject, data)
             
             await self.order_service.create_order(data)
             
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "order.created.ack",
-                json.dumps({
-                    "success": True,
-                    "order_id": data.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling order creation: {e}")
-            await self.nats.publish(
-                "order.created.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
     async def handle_order_updated(self, msg):
         """Handle order update messages."""
         try:
             data = json.loads(msg.data.decode())
-            logger.info(f"Received order update message: {data}")
+            log_payload(logger, msg.subject, data)
 
             await self.order_service.update_order(id=data.get('id'), order_data=data)
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "order.updated.ack",
-                json.dumps({
-                    "success": True,
-                    "order_id": data.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling order update: {e}")
-            await self.nats.publish(
-                "order.updated.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
     async def handle_order_deleted(self, msg):
         """Handle order deletion messages."""
         try:
             data = json.loads(msg.data.decode())
-            logger.info(f"Received order deletion message: {data}")
+            log_payload(logger, msg.subject, data)
 
+            self._deleted_owners.update(await self.lookup_owners([data.get('id')]))
             await self.order_service.delete_order(id=data.get('id'))
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "order.deleted.ack",
-                json.dumps({
-                    "success": True,
-                    "order_id": data.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling order deletion: {e}")
-            await self.nats.publish(
-                "order.deleted.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
             
     async def handle_order_status_changed(self, msg):
         """Handle order status change messages."""
         try:
             data = json.loads(msg.data.decode())
-            logger.info(f"Received order status change message: {data}")
+            log_payload(logger, msg.subject, data)
 
             await self.order_service.update_order_status(
                 id=data.get('id'),
@@ -152,26 +162,10 @@ class OrderSyncHandler:
                 status_data=data.get('status_data', {})
             )
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "order.status_changed.ack",
-                json.dumps({
-                    "success": True,
-                    "order_id": data.get('id'),
-                    "status": data.get('status'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling order status change: {e}")
-            await self.nats.publish(
-                "order.status_changed.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
 order_sync_handler = OrderSyncHandler()
\ No newline at end of file
@@ -1,10 +1,11 @@
-from typing import Dict, Any
+from typing import Dict, List, Any
 import json
 import logging
 from src.services.chroma_service import ChromaService
+from src.services.variant_detail_cache import variant_detail_cache
+from src.handlers.base_sync_handler import BaseSyncHandler, SyncEvent, log_payload
+from src.handlers.jetstream_consumer import jetstream_consumer
 import asyncio
-from nats.aio.client import Client as NATS
-from datetime import datetime
 import os
 import dotenv
 
@@ -13,33 +14,67 @@ dotenv.load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class ProductSyncHandler:
+class ProductSyncHandler(BaseSyncHandler):
+    entity = "product"
+    subject_filter = "product.sync"
+
     def __init__(self):
+        super().__init__()
         self.chroma_service = ChromaService()
-        self.nats = NATS()
         
     async def initialize(self):
-        """Initialize NATS connection and subscriptions."""
+        """Register subject routes on the shared NATS connection."""
         try:
-            await self.nats.connect(
-                servers=[os.getenv("NATS_SERVER_URL", "nats://localhost:4222")],
-                user=os.getenv("NATS_USER"),
-                password=os.getenv("NATS_PASSWORD"),
-                max_reconnect_attempts=5,
-                reconnect_time_wait=1
-            )
-            
+            if self.nats.config.jetstream_enabled:
+                jetstream_consumer.register(self)
+                logger.info("Product sync handler registered for JetStream")
+                return
+
             # Subscribe to product sync messages
-            await self.nats.subscribe(
-                "product.sync",
-                cb=self.handle_product_sync
-            )
+            self.route_messages({
+                "sync": self.handle_product_sync
+            })
             
             logger.info("Product sync handler initialized")
             
         except Exception as e:
             logger.error(f"Error initializing product sync handler: {e}")
             raise
+
+    def parse_event(self, msg) -> SyncEvent:
+        event = super().parse_event(msg)
+        event.entity_id = (event.data.get('product') or {}).get('id')
+        return event
+
+    async def upsert_batch(self, payloads: List[Dict[str, Any]]) -> bool:
+        # product.sync carries its operation in the body, so events normally go through handle_event
+        for product in payloads:
+            await self.apply_product_sync("update", product)
+        return True
+
+    async def delete_batch(self, ids: List[str]) -> bool:
+        variant_detail_cache.invalidate_products(ids)
+        await self.chroma_service.delete_many(ids)
+        return True
+
+    async def handle_event(self, event: SyncEvent) -> bool:
+        product = event.data.get('product')
+        if not product:
+            logger.error("No product data in sync message")
+            return True
+        await self.apply_product_sync(event.data.get('operation'), product)
+        return True
+
+    async def apply_product_sync(self, operation: str, product: Dict[str, Any]):
+        """Apply one product sync operation to ChromaDB."""
+        # Cached variant details embed the product's name, price and category
+        variant_detail_cache.invalidate_products([product.get('id')])
+        if operation == "create":
+            await self.chroma_service.add_documents(product)
+        elif operation == "update":
+            await self.chroma_service.update_document(id=product.get('id'), data=product)
+        elif operation == "delete":
+            await self.chroma_service.delete_documents([product.get('id')])
             
     async def handle_product_sync(self, msg):
         """Handle product sync messages from ASP.NET server."""
@@ -47,39 +82,18 @@ class ProductSyncHandler:
             data = json.loads(msg.data.decode())
             operation = data.get('operation')
             product = data.get('product')
-            logger.info(f"Received product sync message: {data}")
+            log_payload(logger, msg.subject, data)
             
             if not product:
                 logger.error("No product data in sync message")
                 return
                 
-            if operation == "create":
-                await self.chroma_service.add_documents(product)
-            elif operation == "update":
-                await self.chroma_service.update_document(id=product.get('id'), data=product)
-            elif operation == "delete":
-                await self.chroma_service.delete_documents([product.get('id')])
+            await self.apply_product_sync(operation, product)
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "product.sync.ack",
-                json.dumps({
-                    "success": True,
-                    "product_id": product.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=product.get('id'), data=product)
                 
         except Exception as e:
             logger.error(f"Error handling product sync: {e}")
-            # Send error acknowledgment
-            await self.nats.publish(
-                "product.sync.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
 product_sync_handler = ProductSyncHandler()
\ No newline at end of file
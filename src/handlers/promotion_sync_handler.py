@@ -1,82 +1,67 @@
-from typing import Dict, Any
+from typing import Dict, List, Any
 import json
 import logging
 import asyncio
-from nats.aio.client import Client as NATS
-from datetime import datetime
 import os
 import dotenv
 from src.services.promotion_service import PromotionService
+from src.handlers.base_sync_handler import BaseSyncHandler, SyncEvent, log_payload
+from src.handlers.jetstream_consumer import jetstream_consumer
 
 # Load environment variables
 dotenv.load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class PromotionSyncHandler:
+class PromotionSyncHandler(BaseSyncHandler):
+    entity = "promotion"
+    subject_filter = "promotion.*"
+
     def __init__(self):
+        super().__init__()
         self.promotion_service = PromotionService()
-        self.nats = NATS()
         
     async def initialize(self):
-        """Initialize NATS connection and subscriptions."""
+        """Register subject routes on the shared NATS connection."""
         try:
-            await self.nats.connect(
-                servers=[os.getenv("NATS_SERVER_URL", "nats://localhost:4222")],
-                user=os.getenv("NATS_USER"),
-                password=os.getenv("NATS_PASSWORD"),
-                max_reconnect_attempts=5,
-                reconnect_time_wait=1
-            )
-            
+            if self.nats.config.jetstream_enabled:
+                jetstream_consumer.register(self)
+                logger.info("Promotion sync handler registered for JetStream")
+                return
+
             # Subscribe to different promotion sync channels
-            await self.nats.subscribe(
-                "promotion.created",
-                cb=self.handle_promotion_created
-            )
-            await self.nats.subscribe(
-                "promotion.updated",
-                cb=self.handle_promotion_updated
-            )
-            await self.nats.subscribe(
-                "promotion.deleted",
-                cb=self.handle_promotion_deleted
-            )
+            self.route_messages({
+                "created": self.handle_promotion_created,
+                "updated": self.handle_promotion_updated,
+                "deleted": self.handle_promotion_deleted
+            })
             
             logger.info("Promotion sync handler initialized with all channels")
             
         except Exception as e:
             logger.error(f"Error initializing variant sync handler: {e}")
             raise
+
+    async def upsert_batch(self, payloads: List[Dict[str, Any]]) -> bool:
+        return await self.promotion_service.upsert_promotions(payloads)
+
+    async def delete_batch(self, ids: List[str]) -> bool:
+        await self.promotion_service.delete_promotions(ids)
+        return True
             
     async def handle_promotion_created(self, msg):
         """Handle promotion creation messages."""
         try:
             data = json.loads(msg.data.decode())
-            logger.info(f"Received promotion creation message: {data}")
+            log_payload(logger, msg.subject, data)
             
             await self.promotion_service.create_promotion(data)
             
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "promotion.created.ack",
-                json.dumps({
-                    "success": True,
-                    "promotion_id": data.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling promotion creation: {e}")
-            await self.nats.publish(
-                "promotion.created.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
     async def handle_promotion_updated(self, msg):
         """Handle promotion update messages."""
@@ -85,26 +70,11 @@ class PromotionSyncHandler:
 
             await self.promotion_service.update_promotion(id=data.get('id'), promotion_data=data)
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "promotion.updated.ack",
-                json.dumps({
-                    "success": True,
-                    "promotion_id": data.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling promotion update: {e}")
-            await self.nats.publish(
-                "promotion.updated.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
     async def handle_promotion_deleted(self, msg):
         """Handle promotion deletion messages."""
@@ -113,25 +83,10 @@ class PromotionSyncHandler:
 
             await self.promotion_service.delete_promotion(id=data.get('id'))
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "promotion.deleted.ack",
-                json.dumps({
-                    "success": True,
-                    "promotion_id": data.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling promotion deletion: {e}")
-            await self.nats.publish(
-                "promotion.deleted.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
 promotion_sync_handler = PromotionSyncHandler()
\ No newline at end of file
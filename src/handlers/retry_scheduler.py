@@ -0,0 +1,178 @@
+from typing import Dict, List, Any, Optional, Set
+import asyncio
+import logging
+import os
+
+from src.core.backoff import backoff_delay
+from src.handlers.coalescer import merge_into
+from src.handlers.dead_letter_store import DeadLetterStore, dead_letter_store
+from src.handlers.sync_event import SyncEvent
+
+logger = logging.getLogger(__name__)
+
+
+class RetryScheduler:
+    """Re-applies failed sync events later without holding the consumer.
+
+    Failed events wait on a timer per entity id with exponential backoff and
+    jitter, then are re-applied through the handler's bulk path. Failures
+    for an id that already waits are merged into the pending event with the
+    handler's merge_event, or queued after it, so a status change never
+    drops a pending full upsert. A newer create, update or delete that is
+    applied supersedes the pending retries and acks their messages. After
+    max_attempts an event is written to the dead-letter store and
+    acknowledged as failed. Retries still waiting at shutdown are saved
+    unacked and resumed by restore on the next start.
+    """
+
+    def __init__(
+        self,
+        handler: Any,
+        store: DeadLetterStore = dead_letter_store,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        self.handler = handler
+        self.store = store
+        self.max_attempts = max_attempts or int(os.getenv("SYNC_RETRY_MAX_ATTEMPTS", "5"))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv("SYNC_RETRY_BASE_DELAY", "1"))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("SYNC_RETRY_MAX_DELAY", "60"))
+        # Events waiting for their retry, in order, per id
+        self._pending: Dict[Any, List[SyncEvent]] = {}
+        self._timers: Dict[Any, asyncio.TimerHandle] = {}
+        # Events being retried right now, and newer failures for the same id held until they settle
+        self._retrying: Dict[Any, List[SyncEvent]] = {}
+        self._deferred: Dict[Any, List[SyncEvent]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.scheduled = 0
+        self.retried = 0
+        self.recovered = 0
+        self.merged = 0
+        self.superseded = 0
+        self.dead_lettered = 0
+
+    @staticmethod
+    def _key(event: SyncEvent) -> Any:
+        return event.entity_id or id(event)
+
+    async def schedule(self, event: SyncEvent, error: Optional[str] = None) -> None:
+        """Record a failed attempt and retry later, or dead-letter the event"""
+        event.attempts += 1
+        if event.attempts >= self.max_attempts:
+            await self.dead_letter(event, error or f"Failed to apply {event.subject}")
+            return
+
+        self.scheduled += 1
+        key = self._key(event)
+        if key in self._retrying and not any(event is retried for retried in self._retrying[key]):
+            # Newer than the events being retried, so it must not be parked ahead of their failures
+            self._deferred.setdefault(key, []).append(event)
+            return
+        self._park(event)
+
+    def _park(self, event: SyncEvent) -> None:
+        """Add a failed event to the pending chain for its id and start its timer"""
+        key = self._key(event)
+        chain = self._pending.get(key)
+        attempts = max([event.attempts] + [pending.attempts for pending in chain or []])
+        if merge_into(self.handler, self._pending, event):
+            self._pending[key][-1].attempts = attempts
+            self.merged += 1
+
+        if key not in self._timers:
+            delay = backoff_delay(attempts, self.base_delay, self.max_delay)
+            self._timers[key] = asyncio.get_running_loop().call_later(delay, self._retry_in_background, key)
+            logger.info(f"Retrying {event.subject} for {event.entity_id} in {delay:.1f}s (attempt {attempts + 1})")
+
+    async def discard(self, entity_id: Optional[str], applied: Optional[SyncEvent] = None) -> None:
+        """Ack the pending retries for an id whose newer full state has been applied"""
+        if entity_id is None:
+            return
+        timer = self._timers.pop(entity_id, None)
+        if timer is not None:
+            timer.cancel()
+        superseded = self._pending.pop(entity_id, [])
+        # Failures deferred during a retry are newer than the retried event itself
+        retried = self._retrying.get(entity_id, [])
+        if not any(applied is event for event in retried):
+            superseded += self._deferred.pop(entity_id, [])
+
+        for event in superseded:
+            self.superseded += 1
+            for source in event.sources():
+                await self.handler.record_ack(source, True)
+
+    def _retry_in_background(self, key: Any) -> None:
+        self._timers.pop(key, None)
+        chain = self._pending.pop(key, None)
+        if not chain:
+            return
+        self._retrying[key] = chain
+        task = asyncio.get_running_loop().create_task(self._retry(key, chain))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _retry(self, key: Any, chain: List[SyncEvent]) -> None:
+        self.retried += len(chain)
+        try:
+            results = await self.handler.process_batch_sharded(chain)
+            self.recovered += sum(1 for success in results if success)
+            await self.handler.settle(chain, results)
+        finally:
+            self._retrying.pop(key, None)
+            for event in self._deferred.pop(key, []):
+                self._park(event)
+
+    async def dead_letter(self, event: SyncEvent, error: str) -> None:
+        """Persist an event that cannot be applied and ack its messages as failed"""
+        await self.store.add(self.handler.entity, event, error, event.attempts)
+        self.dead_lettered += 1
+        for source in event.sources():
+            await self.handler.record_ack(source, False)
+
+    async def restore(self) -> None:
+        """Resume the retries saved at the last shutdown, keeping their attempt counts"""
+        try:
+            events = await self.store.take_pending(self.handler.entity)
+        except Exception as e:
+            logger.error(f"Could not load pending {self.handler.entity} retries: {e}")
+            return
+        for event in events:
+            self._park(event)
+        if events:
+            logger.info(f"Resumed {len(events)} pending {self.handler.entity} retries")
+
+    async def stop(self) -> None:
+        """Wait for running retries and save the ones still waiting for the next start"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        pending, self._pending = self._pending, {}
+        deferred, self._deferred = self._deferred, {}
+        # A shutdown is not a failure: keep the events unacked instead of dead-lettering them.
+        # Coalesced sources are folded into each event, so saving the event keeps their changes.
+        events = [event for chain in list(pending.values()) + list(deferred.values()) for event in chain]
+        try:
+            await self.store.save_pending(self.handler.entity, events)
+        except Exception as e:
+            logger.error(f"Could not save pending {self.handler.entity} retries, dead-lettering them: {e}")
+            for event in events:
+                await self.dead_letter(event, "Shut down before retry")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get retry counters"""
+        return {
+            "max_attempts": self.max_attempts,
+            "pending": sum(len(chain) for chain in self._pending.values()),
+            "retrying": sum(len(chain) for chain in self._retrying.values()),
+            "scheduled": self.scheduled,
+            "retried": self.retried,
+            "recovered": self.recovered,
+            "merged": self.merged,
+            "superseded": self.superseded,
+            "dead_lettered": self.dead_lettered
+        }
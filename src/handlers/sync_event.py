@@ -0,0 +1,22 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+from nats.aio.msg import Msg
+
+
+@dataclass
+class SyncEvent:
+    """A decoded sync message"""
+    subject: str
+    action: str
+    entity_id: Optional[str]
+    data: Dict[str, Any]
+    msg: Optional[Msg] = None
+    # Earlier events for the same id that were collapsed into this one
+    coalesced: List["SyncEvent"] = field(default_factory=list)
+    # Failed attempts so far, used by the retry scheduler
+    attempts: int = 0
+
+    def sources(self) -> List["SyncEvent"]:
+        """This event and every event coalesced into it"""
+        return [self] + self.coalesced
@@ -1,59 +1,62 @@
-from typing import Dict, Any
+from typing import Dict, List, Any
 import json
 import logging
 import asyncio
-from nats.aio.client import Client as NATS
-from datetime import datetime
 import os
 import dotenv
 from src.services.variant_service import VariantService
+from src.services.variant_detail_cache import variant_detail_cache
+from src.handlers.base_sync_handler import BaseSyncHandler, log_payload
+from src.handlers.jetstream_consumer import jetstream_consumer
 
 # Load environment variables
 dotenv.load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class VariantSyncHandler:
+class VariantSyncHandler(BaseSyncHandler):
+    entity = "variant"
+    subject_filter = "variant.*"
+
     def __init__(self):
+        super().__init__()
         self.variant_service = VariantService()
-        self.nats = NATS()
         
     async def initialize(self):
-        """Initialize NATS connection and subscriptions."""
+        """Register subject routes on the shared NATS connection."""
         try:
-            await self.nats.connect(
-                servers=[os.getenv("NATS_SERVER_URL", "nats://localhost:4222")],
-                user=os.getenv("NATS_USER"),
-                password=os.getenv("NATS_PASSWORD"),
-                max_reconnect_attempts=5,
-                reconnect_time_wait=1
-            )
-            
+            if self.nats.config.jetstream_enabled:
+                jetstream_consumer.register(self)
+                logger.info("Variant sync handler registered for JetStream")
+                return
+
             # Subscribe to different variant sync channels
-            await self.nats.subscribe(
-                "variant.created",
-                cb=self.handle_variant_created
-            )
-            await self.nats.subscribe(
-                "variant.updated",
-                cb=self.handle_variant_updated
-            )
-            await self.nats.subscribe(
-                "variant.deleted",
-                cb=self.handle_variant_deleted
-            )
+            self.route_messages({
+                "created": self.handle_variant_created,
+                "updated": self.handle_variant_updated,
+                "deleted": self.handle_variant_deleted
+            })
             
             logger.info("Variant sync handler initialized with all channels")
             
         except Exception as e:
             logger.error(f"Error initializing variant sync handler: {e}")
             raise
+
+    async def upsert_batch(self, payloads: List[Dict[str, Any]]) -> bool:
+        # Cached prompt details go stale as soon as the source row changes
+        variant_detail_cache.invalidate_many(payload.get('id') for payload in payloads)
+        return await self.variant_service.upsert_variants(payloads)
+
+    async def delete_batch(self, ids: List[str]) -> bool:
+        variant_detail_cache.invalidate_many(ids)
+        return await self.variant_service.delete_variants(ids)
             
     async def handle_variant_created(self, msg):
         """Handle variant creation messages."""
         try:
             data = json.loads(msg.data.decode())
-            logger.info(f"Received variant creation message: {data}")
+            log_payload(logger, msg.subject, data)
 
             if not data.get('id'):
                 logger.error("No variant ID in creation message")
@@ -61,92 +64,49 @@ class VariantSyncHandler:
                 
             await self.variant_service.create_variant(variant_data=data)
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "variant.created.ack",
-                json.dumps({
-                    "success": True,
-                    "variant_id": data.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling variant creation: {e}")
-            await self.nats.publish(
-                "variant.created.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
     async def handle_variant_updated(self, msg):
         """Handle variant update messages."""
         try:
             data = json.loads(msg.data.decode())
-            logger.info(f"Received variant update message: {data}")
+            log_payload(logger, msg.subject, data)
 
             if not data.get('id'):
                 logger.error("No variant ID in update message")
                 return
 
+            variant_detail_cache.invalidate_many([data.get('id')])
             await self.variant_service.update_variant(id=data.get('id'), variant_data=data)
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "variant.updated.ack",
-                json.dumps({
-                    "success": True,
-                    "variant_id": data.get('id'),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=data.get('id'), data=data)
                 
         except Exception as e:
             logger.error(f"Error handling variant update: {e}")
-            await self.nats.publish(
-                "variant.updated.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
     async def handle_variant_deleted(self, msg):
         """Handle variant deletion messages."""
         try:
             data = json.loads(msg.data.decode())
             id = data.get('id')
-            logger.info(f"Received variant deletion message: {data}")
+            log_payload(logger, msg.subject, data)
 
             if not id:
                 logger.error("No variant ID in deletion message")
                 return
 
+            variant_detail_cache.invalidate_many([id])
             await self.variant_service.delete_variant(id=id)
 
-            # Acknowledge successful processing
-            await self.nats.publish(
-                "variant.deleted.ack",
-                json.dumps({
-                    "success": True,
-                    "variant_id": id,
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, True, entity_id=id, data=data)
                 
         except Exception as e:
             logger.error(f"Error handling variant deletion: {e}")
-            await self.nats.publish(
-                "variant.deleted.ack",
-                json.dumps({
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }).encode()
-            )
+            await self.ack_message(msg, False, error=str(e))
 
 variant_sync_handler = VariantSyncHandler()
\ No newline at end of file
@@ -1,9 +1,15 @@
+import asyncio
 import json
+import logging
+import time
 from google.genai import types
-from typing import Dict, List
+from typing import Any, AsyncIterator, Dict, List, Tuple
 from src.managers.function_calling_manager import FunctionCallingManager
-import os
-from google import genai
+from src.api.gemini_client import gemini_client
+from src.managers.static_responses import static_responses
+from src.managers.semantic_cache import semantic_response_cache
+
+logger = logging.getLogger(__name__)
 
 SYSTEM_INSTRUCTION = """You are Roomie, the friendly AI assistant for DearHome - a premium interior design and home furnishing company.
 
@@ -42,54 +48,235 @@ KEY PRINCIPLES:
 class Chatbot:
     def __init__(self, functions: List[Dict]):
         self.function_manager = FunctionCallingManager()
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
-    async def process_query(self, query: str, user_id: str | None) -> str:
-        # 1. Identify the intent of the query using KNN and cosine similarity
-        function_name = self.function_manager.classify_intent_knn_and_cos(query)
+        self.client = gemini_client
 
+    async def run_function(self, function_name: str, parameters: Dict[str, Any], user_id: str | None) -> Any:
+        """Run a resolved function with its extracted parameters"""
         if function_name == "unknown":
-            return self.generate_natural_language_response(
-                function_name="unknown",
-                result={"error": "Sorry, I couldn't understand your request. Could you please rephrase it?"}
-            )
+            return {"error": "Sorry, I couldn't understand your request. Could you please rephrase it?"}
+        return await self.function_manager.call_function(function_name, parameters, user_id=user_id)
+
+    async def resolve_intents(self, query: str, user_id: str | None, intents: List[str]) -> List[Tuple[str, Any]]:
+        """Run the functions of several detected intents concurrently; returns (name, result) pairs"""
+        function_calls = await self.function_manager.resolve_function_calls(query, intents)
+        results = await asyncio.gather(
+            *(self.function_manager.call_function(name, parameters, user_id=user_id) for name, parameters in function_calls),
+            return_exceptions=True
+        )
+
+        resolved = []
+        for (name, _), result in zip(function_calls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Function {name} failed for multi-intent query: {result}")
+                result = {"error": f"Could not look up {name.replace('_', ' ')} right now."}
+            resolved.append((name, result))
+        return resolved
+
+    async def static_response(self, ranking: Tuple[str, List[str], float], locale: str | None) -> str | None:
+        """Answer a confidently classified static intent without calling the LLM"""
+        intent, _, confidence = ranking
+        if not static_responses.handles(intent, confidence):
+            return None
+
+        async def render() -> str:
+            result = await self.function_manager.call_function(intent, {}, user_id=None)
+            return await self._generate_response([(intent, result)], locale=static_responses.normalize_locale(locale))
+
+        return await static_responses.respond(intent, locale, render)
+
+    async def cached_response(
+        self,
+        query: str,
+        function_name: str,
+        parameters: Dict[str, Any],
+        user_id: str | None,
+        locale: str | None
+    ) -> Tuple[Any, List[float], str | None]:
+        """Look up a reply given earlier to a similar query for the same function call"""
+        scope = semantic_response_cache.scope_for(
+            function_name, user_id, static_responses.normalize_locale(locale), arguments=parameters
+        )
+        if scope is None:
+            return None, None, None
+        # Already computed by rank_intents, so this is an embedding cache hit
+        embedding = await self.function_manager.create_embedding(query)
+        return scope, embedding, semantic_response_cache.get(scope, embedding)
+
+    async def process_query(self, query: str, user_id: str | None, locale: str | None = None) -> str:
+        started_at = time.perf_counter()
+        ranking = await self.function_manager.rank_intents(query)
+
+        # Questions spanning several intents are answered in one merged render.
+        # Checked before canned replies so "hi, what's the price of..." is not just greeted.
+        intents = await self.function_manager.detect_intents(query, k=5)
+        if len(intents) > 1:
+            function_results = await self.resolve_intents(query, user_id, intents)
+            return await self.render_results(function_results, locale=locale)
+
+        response = await self.static_response(ranking, locale)
+        if response is not None:
+            return response
 
-        # 2. Extract parameters for the identified function
-        parameters = self.function_manager.extract_parameters(query, function_name)
+        # 1. Narrow the intents with KNN, then choose and parameterize the function in one call
+        function_name, parameters = await self.function_manager.resolve_function_call(query, ranking=ranking)
+        scope, embedding, response = await self.cached_response(query, function_name, parameters, user_id, locale)
+        if response is not None:
+            return response
 
-        # 3. Call the function with the extracted parameters
-        result = await self.function_manager.call_function(function_name, parameters, user_id=user_id)
+        # 2. Call the function with the extracted parameters
+        result = await self.run_function(function_name, parameters, user_id)
 
-        # 4. Generate a natural language response based on the function call result
-        response = self.generate_natural_language_response(function_name, result)
+        # 3. Generate a natural language response based on the function call result
+        response = await self.generate_natural_language_response(function_name, result, locale=locale)
+        semantic_response_cache.put(scope, embedding, response, (time.perf_counter() - started_at) * 1000)
         return response
 
-    def generate_natural_language_response(self, function_name: str, result: Dict) -> str:
-        contents = []
-        function_to_object = self.function_manager.function_to_object(function_name)
-        contents.append(types.Content(role="model", parts=[types.Part(function_call=function_to_object)]))
-        # Format the result appropriately based on its type
+    async def stream_query(self, query: str, user_id: str | None, locale: str | None = None) -> AsyncIterator[Dict[str, Any]]:
+        """Like process_query, but yields delta events followed by a done event"""
+        started_at = time.perf_counter()
+        ranking = await self.function_manager.rank_intents(query)
+        intents = await self.function_manager.detect_intents(query, k=5)
+        if len(intents) > 1:
+            function_results = await self.resolve_intents(query, user_id, intents)
+            async for event in self.render_results(function_results, stream=True, locale=locale):
+                yield event
+            return
+
+        response = await self.static_response(ranking, locale)
+        source = "static"
+        if response is None:
+            function_name, parameters = await self.function_manager.resolve_function_call(query, ranking=ranking)
+            scope, embedding, response = await self.cached_response(query, function_name, parameters, user_id, locale)
+            source = "cached"
+        if response is not None:
+            elapsed_ms = round((time.perf_counter() - started_at) * 1000, 1)
+            yield {"type": "delta", "text": response}
+            yield {"type": "done", "text": response, "usage": {source: True, "first_token_ms": elapsed_ms, "duration_ms": elapsed_ms}}
+            return
+
+        result = await self.run_function(function_name, parameters, user_id)
+        async for event in self.generate_natural_language_response(function_name, result, stream=True, locale=locale):
+            if event["type"] == "done":
+                semantic_response_cache.put(scope, embedding, event["text"], (time.perf_counter() - started_at) * 1000)
+            yield event
+
+    @staticmethod
+    def _function_response(result: Any) -> Dict[str, Any]:
+        """Shape a function result as the dict a function response part carries"""
+        # Most functions return JSON strings
+        if isinstance(result, str):
+            try:
+                result = json.loads(result)
+            except ValueError:
+                pass
         if isinstance(result, dict):
-            result_text = json.dumps(result)
-            contents.append(types.Content(role="user", parts=[types.Part(text=result_text)]))
-        elif isinstance(result, str):
-            contents.append(types.Content(role="user", parts=[types.Part(text=result)]))
-        else:
+            return result
+        if not isinstance(result, (str, int, float, bool, list)) and result is not None:
             # Handle other types by converting to string
-            contents.append(types.Content(role="user", parts=[types.Part(text=str(result))]))
+            result = str(result)
+        return {"result": result}
+
+    def _build_response_request(
+        self,
+        function_results: List[Tuple[str, Any]],
+        locale: str | None = None
+    ) -> Tuple[List[types.Content], types.GenerateContentConfig]:
+        multiple = len(function_results) > 1
+        call_parts = []
+        result_parts = []
+        for function_name, result in function_results:
+            function_to_object = self.function_manager.function_to_object(function_name)
+            call_parts.append(types.Part(function_call=function_to_object))
+            # Every call is answered by a function response with the same name
+            result_parts.append(types.Part.from_function_response(
+                name=function_name,
+                response=self._function_response(result)
+            ))
+        contents = [
+            types.Content(role="model", parts=call_parts),
+            types.Content(role="user", parts=result_parts)
+        ]
 
         system_instruction = SYSTEM_INSTRUCTION
+        if multiple:
+            system_instruction += "\nThe customer asked several things at once. Answer every part in one reply.\n"
+        if locale:
+            system_instruction += f"\nReply in the language with code '{locale}'.\n"
 
         generation_config = types.GenerateContentConfig(
             system_instruction=system_instruction,
         )
+        return contents, generation_config
+
+    def generate_natural_language_response(
+        self,
+        function_name: str,
+        result: Any,
+        stream: bool = False,
+        locale: str | None = None
+    ):
+        """Render a function result as a reply.
+
+        Returns an awaitable of the full text, or with stream=True an async
+        iterator of {"type": "delta", "text"} events followed by one
+        {"type": "done", "text", "usage"} event.
+        """
+        return self.render_results([(function_name, result)], stream=stream, locale=locale)
+
+    def render_results(
+        self,
+        function_results: List[Tuple[str, Any]],
+        stream: bool = False,
+        locale: str | None = None
+    ):
+        """Render one or more (function name, result) pairs as a single reply"""
+        if stream:
+            return self._stream_response(function_results, locale=locale)
+        return self._generate_response(function_results, locale=locale)
 
-        final_response = self.client.models.generate_content(
+    async def _generate_response(self, function_results: List[Tuple[str, Any]], locale: str | None = None) -> str:
+        contents, generation_config = self._build_response_request(function_results, locale=locale)
+        final_response = await self.client.generate_content(
             model="gemini-2.0-flash",
             contents=contents,
             config=generation_config,
         )
 
         return final_response.text
+
+    async def _stream_response(self, function_results: List[Tuple[str, Any]], locale: str | None = None) -> AsyncIterator[Dict[str, Any]]:
+        contents, generation_config = self._build_response_request(function_results, locale=locale)
+        started_at = time.perf_counter()
+        first_token_ms = None
+        text_parts = []
+        usage = None
+
+        async for chunk in self.client.stream_content(
+            model="gemini-2.0-flash",
+            contents=contents,
+            config=generation_config,
+        ):
+            # The last chunk carries the token counts for the whole response
+            if chunk.usage_metadata is not None:
+                usage = chunk.usage_metadata
+            text = chunk.text
+            if not text:
+                continue
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - started_at) * 1000, 1)
+            text_parts.append(text)
+            yield {"type": "delta", "text": text}
+
+        yield {
+            "type": "done",
+            "text": "".join(text_parts),
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_token_count", None),
+                "response_tokens": getattr(usage, "candidates_token_count", None),
+                "total_tokens": getattr(usage, "total_token_count", None),
+                "first_token_ms": first_token_ms,
+                "duration_ms": round((time.perf_counter() - started_at) * 1000, 1)
+            }
+        }
         
 chatbot_manager = Chatbot(functions=[])  # Initialize with an empty list or your actual functions
\ No newline at end of file
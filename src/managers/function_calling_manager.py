@@ -1,13 +1,15 @@
-from typing import Tuple
-from sklearn.metrics.pairwise import cosine_similarity
+import inspect
 import json
-import numpy as np
-from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
 import os
-from google import genai
-from nats.aio.client import Client as NATS
+import typing
+from typing import List, Dict, Any, Optional, Tuple
+from google.genai import types
+from src.api.gemini_client import gemini_client
+from src.core.build_intent_embeddings import load_or_build_intent_index
 from src.services.chroma_service import ChromaService
+from src.services.embedding_registry import embedding_model_registry
+from src.services.embedding_batcher import embedding_batcher
+from src.services.embedding_cache import embedding_cache
 import logging
 
 from src.services.variant_service import VariantService
@@ -15,8 +17,6 @@ from src.services.order_service import order_service
 
 logger = logging.getLogger(__name__)
 
-nc = NATS()
-
 RETURN_POLICY = {
     "return_policy": "You can return any product within 30 days of purchase for a full refund. The product must be in its original condition and packaging."
 }
@@ -36,22 +36,102 @@ SHIPPING_METHODS = {
 }
 
 
+# Parameters filled in server-side rather than by the model
+SERVER_PARAMETERS = {"self", "user_id"}
+
+# Python annotations mapped to Gemini schema types
+SCHEMA_TYPES = {
+    str: types.Type.STRING,
+    int: types.Type.INTEGER,
+    float: types.Type.NUMBER,
+    bool: types.Type.BOOLEAN,
+    list: types.Type.ARRAY,
+    dict: types.Type.OBJECT,
+}
+
+
+def parameter_schema(annotation: Any) -> types.Schema:
+    """Build a Gemini schema for a parameter annotation"""
+    origin = typing.get_origin(annotation) or annotation
+    schema_type = SCHEMA_TYPES.get(origin, types.Type.STRING)
+    if schema_type == types.Type.ARRAY:
+        item_args = typing.get_args(annotation)
+        return types.Schema(type=schema_type, items=parameter_schema(item_args[0] if item_args else str))
+    return types.Schema(type=schema_type)
+
+
 class FunctionCallingManager:
     def __init__(self):
         self.function_calls = []
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.embedding_file_path = "src/core/intent_embeddings.json"
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        self.embedding_model_name = 'all-MiniLM-L6-v2'
+        self.model = embedding_model_registry.acquire(self.embedding_model_name, 'cpu')
+        self.intent_index = load_or_build_intent_index(self.model, self.embedding_model_name)
+        self.client = gemini_client
         self.chroma_service = ChromaService()
         self.variant_service = VariantService()
-        # self.nats = NATS()
-        # self.nats.max_payload_size = 1048576  # 1MB limit
+        # Upper bound on tools offered to the model after KNN narrowing
+        self.max_candidate_functions = int(os.getenv("FUNCTION_CANDIDATES", "3"))
+        # Nearest examples searched for those tools; classification still votes over k
+        self.candidate_neighbours = int(os.getenv("FUNCTION_CANDIDATE_NEIGHBOURS", "5"))
+        # A query is answered by several functions when more than one intent clears these
+        self.multi_intent_threshold = float(os.getenv("MULTI_INTENT_THRESHOLD", "0.5"))
+        self.multi_intent_min_votes = int(os.getenv("MULTI_INTENT_MIN_VOTES", "2"))
+        self.max_intents = int(os.getenv("MULTI_INTENT_MAX", "3"))
+        self.function_declarations = self.build_function_declarations()
         # self.pending_requests = {}
 
-    def create_embedding(self, text: str, retry_count=3, delay=1) -> List[float]:
-        embedding = self.model.encode(text, show_progress_bar=True)
+    async def create_embedding(self, text: str, retry_count=3, delay=1) -> List[float]:
+        return await embedding_cache.get_or_compute(
+            self.embedding_model_name,
+            text,
+            lambda: embedding_batcher.embed(text, model_name=self.embedding_model_name, device='cpu')
+        )
+
+    def function_map(self) -> Dict[str, Any]:
+        """Callable functions keyed by intent name"""
+        return {
+            "greeting": self.greeting,
+            "product_search": self.product_search,
+            "product_information_inquiry": self.product_information_inquiry,
+            "product_dimensions": self.product_dimensions,
+            "product_material": self.product_material,
+            "product_color": self.product_color, 
+            "interior_design_advice": self.interior_design_advice,
+            "color_matching_advice": self.color_matching_advice,
+            "price_inquiry": self.price_inquiry,
+            "discount_inquiry": self.discount_inquiry,
+            "order_status": self.order_status,
+            "return_policy": self.return_policy,
+            "shipping_inquiry": self.shipping_inquiry,
+            "payment_methods": self.payment_methods,
+            "product_availability": self.product_availability,
+            "thank_you": self.thank_you,
+            "goodbye": self.goodbye
+        }
 
-        return embedding.tolist()
+    def build_function_declarations(self) -> Dict[str, types.FunctionDeclaration]:
+        """Generate Gemini function declarations from the function signatures once"""
+        declarations = {}
+        for name, function in self.function_map().items():
+            properties = {}
+            required = []
+            for parameter in inspect.signature(function).parameters.values():
+                if parameter.name in SERVER_PARAMETERS:
+                    continue
+                properties[parameter.name] = parameter_schema(parameter.annotation)
+                if parameter.default is inspect.Parameter.empty:
+                    required.append(parameter.name)
+
+            declarations[name] = types.FunctionDeclaration(
+                name=name,
+                description=inspect.getdoc(function) or name.replace("_", " "),
+                parameters=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties=properties,
+                    required=required
+                ) if properties else None
+            )
+        return declarations
 
     def function_to_object(self, function_name: str) -> Dict[str, Any]:
         
@@ -59,157 +139,171 @@ class FunctionCallingManager:
             "name": function_name 
         }
 
-    def load_json_embedding_file(self) -> List[Dict[str, Any]]:
-        with open(self.embedding_file_path, 'r') as f:
-            return json.load(f)
+    async def classify_intent_knn_and_cos(self, query: str, k: int = 3) -> str:
+        best_intent, _, _ = await self.rank_intents(query, k)
+        return best_intent
+
+    async def rank_intents(self, query: str, k: int = 3) -> Tuple[str, List[str], float]:
+        """Classify the query; returns the intent, the nearest intents best first, and the confidence.
 
-    def classify_intent_knn_and_cos(self, query: str, k: int = 3) -> Tuple[str, float]:
+        Only the k nearest examples vote. The neighbour list is drawn from the
+        wider candidate_neighbours window so function calling has tools to
+        choose between.
+        """
         # Tạo embedding cho câu truy vấn
-        query_embedding = self.create_embedding(query)
+        query_embedding = await self.create_embedding(query)
 
-        intent_embeddings = self.load_json_embedding_file()
+        # Lấy k láng giềng gần nhất từ ma trận intent đã chuẩn hóa
+        top_intents, top_similarities = self.intent_index.top_k(query_embedding, max(k, self.candidate_neighbours))
+        neighbours = list(dict.fromkeys(top_intents))
 
-        # Chuẩn bị danh sách để lưu trữ tất cả các độ tương đồng
-        all_similarities = []
+        intent_scores = self._score_intents(top_intents[:k], top_similarities[:k], k)
 
-        # Tính độ tương đồng với tất cả các câu mẫu
-        for item in intent_embeddings:  # Iterate through the list
-            intent = item["tag"]
-            example_embedding = np.array(item["embedding"])  # Convert to NumPy array
+        # Tìm intent phổ biến nhất
+        if not intent_scores:
+            return "unknown", [], 0.0  # Handle the case where no intents are found
 
-            similarity = cosine_similarity([query_embedding], [example_embedding])[0][0]
-            all_similarities.append({
-                "intent": intent,
-                "similarity": similarity
-            })
+        best_intent = max(intent_scores, key=lambda intent: intent_scores[intent][0])
+        overall_confidence = intent_scores[best_intent][1]
 
-        # Sắp xếp theo độ tương đồng giảm dần
-        all_similarities.sort(key=lambda x: x["similarity"], reverse=True)
+        if overall_confidence < 0.5:
+            return "unknown", neighbours, overall_confidence
 
-        # Lấy k láng giềng gần nhất
-        top_k = all_similarities[:k]
+        # Trả về intent tốt nhất, theo sau là các intent lân cận
+        return best_intent, [best_intent] + [intent for intent in neighbours if intent != best_intent], overall_confidence
 
+    @staticmethod
+    def _score_intents(top_intents: List[str], top_similarities: Any, k: int) -> Dict[str, Tuple[int, float]]:
+        """Vote count and overall confidence of each intent among the k nearest examples"""
         # Đếm số lần xuất hiện của mỗi intent trong top k
         intent_counts = {}
-        for item in top_k:
-            intent = item["intent"]
-            if intent in intent_counts:
-                intent_counts[intent] += 1
-            else:
-                intent_counts[intent] = 1
-
-        # Tìm intent phổ biến nhất
-        if not intent_counts:
-            return "unknown", 0.0  # Handle the case where no intents are found
-
-        best_intent = max(intent_counts, key=intent_counts.get)
-
-        # Tính độ tin cậy dựa trên số lần xuất hiện và độ tương đồng trung bình
-        confidence = intent_counts[best_intent] / k
-        avg_similarity = sum(item["similarity"] for item in top_k if item["intent"] == best_intent) / intent_counts[best_intent]
+        intent_similarities = {}
+        for intent, similarity in zip(top_intents, top_similarities):
+            intent_counts[intent] = intent_counts.get(intent, 0) + 1
+            intent_similarities[intent] = intent_similarities.get(intent, 0.0) + float(similarity)
 
-        # Kết hợp hai yếu tố để có độ tin cậy tổng thể
-        overall_confidence = (confidence + avg_similarity) / 2
-
-        if overall_confidence < 0.5:
-            return "unknown"
-        # Trả về intent tốt nhất và độ tin cậy
-        best_intent = best_intent if overall_confidence >= 0.5 else "unknown"
-
-        return best_intent
-    
-    def extract_parameters(self, query: str, function_name) -> Dict[str, Any]:
-        """Trích xuất các tham số từ câu truy vấn."""
-        # Define the function parameters based on function name
-        function_params = {
-            "greeting": [],
-            "product_search": ["query"],
-            "product_information_inquiry": ["product_name"],
-            "product_dimensions": ["product_name"],
-            "product_material": ["product_name"],
-            "product_color": ["product_name"],
-            "interior_design_advice": ["room_type", "style", "constraint", "goal"],
-            "color_matching_advice": ["base_elements", "style", "atmosphere"],
-            "price_inquiry": ["product_name"],
-            "discount_inquiry": ["name", "code", "description", "start_date", "end_date", "is_active", "customer_level", "discount_percentage"],
-            "order_status": ["status", "total_price", "discount", "final_price", "order_date", "shipping_address", "order_details"],
-            "return_policy": [],
-            "shipping_inquiry": ["order_id"],
-            "payment_methods": [],
-            "product_availability": ["product_name"],
-            "thank_you": [],
-            "goodbye": []
+        # Kết hợp tỉ lệ phiếu và độ tương đồng trung bình để có độ tin cậy tổng thể
+        return {
+            intent: (count, (count / k + intent_similarities[intent] / count) / 2)
+            for intent, count in intent_counts.items()
         }
 
-        required_params = function_params.get(function_name, [])
-
-        if not required_params:
-            # If no parameters are required, return an empty dict
-            return {}
-        
-        # Create a more specific prompt based on the required parameters
-        param_desc = ", ".join([f"'{param}'" for param in required_params]) if required_params else "no parameters"
-        prompt = f"""Extract parameters for the function '{function_name}' from this query: "{query}"
-
-Required parameters: {param_desc}
-
-Instructions:
-1. Only extract the required parameters listed above
-2. Return a simple JSON object with parameter names and values
-3. If a parameter is not found, use a reasonable default or empty string
-
-Example format:
-{{
-    {', '.join([f'"{param}": "<extracted value>"' for param in required_params]) if required_params else '"no_params": true'}
-}}
-
-Return only valid JSON, no additional text."""
-
-        response = self.client.models.generate_content(
-            contents=prompt,
+    async def detect_intents(self, query: str, k: int = 5) -> List[str]:
+        """Every intent among the k nearest examples that clears the multi-intent threshold, best first"""
+        query_embedding = await self.create_embedding(query)
+        top_intents, top_similarities = self.intent_index.top_k(query_embedding, k)
+        intent_scores = self._score_intents(top_intents, top_similarities, k)
+
+        detected = [
+            intent for intent, (count, confidence) in intent_scores.items()
+            if count >= self.multi_intent_min_votes
+            and confidence >= self.multi_intent_threshold
+            and intent in self.function_declarations
+        ]
+        detected.sort(key=lambda intent: intent_scores[intent], reverse=True)
+        return detected[:self.max_intents]
+
+    async def resolve_function_call(
+        self,
+        query: str,
+        k: int = 3,
+        ranking: Optional[Tuple[str, List[str], float]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Choose and parameterize the function for a query with at most one model call.
+
+        The KNN classifier narrows the declared tools to the nearest intents;
+        Gemini native function calling then picks one of them and fills in its
+        arguments. A confident match that takes no arguments needs no call.
+        """
+        best_intent, neighbours, _ = ranking or await self.rank_intents(query, k)
+        if best_intent == "unknown":
+            return "unknown", {}
+
+        candidates = [name for name in neighbours if name in self.function_declarations]
+        candidates = candidates[:self.max_candidate_functions]
+        if len(candidates) == 1 and self.function_declarations[candidates[0]].parameters is None:
+            return candidates[0], {}
+
+        config = types.GenerateContentConfig(
+            tools=[types.Tool(function_declarations=[self.function_declarations[name] for name in candidates])],
+            tool_config=types.ToolConfig(
+                function_calling_config=types.FunctionCallingConfig(
+                    mode=types.FunctionCallingConfigMode.ANY,
+                    allowed_function_names=candidates
+                )
+            )
+        )
+        response = await self.client.generate_content(
+            contents=query,
             model="gemini-2.0-flash",
+            config=config,
         )
 
-        try:
-            # Extract JSON from the response text
-            text = response.text
-            # Find the first { and last } to extract just the JSON part
-            start = text.find('{')
-            end = text.rfind('}') + 1
-            if start >= 0 and end > start:
-                json_str = text[start:end]
-                parameters = json.loads(json_str)
-                return parameters
+        function_calls = response.function_calls or []
+        if not function_calls or function_calls[0].name not in self.function_declarations:
+            logger.warning(f"No function call returned for query, falling back to {best_intent}")
+            return best_intent, self._default_arguments(best_intent)
+        function_call = function_calls[0]
+        return function_call.name, self._clean_arguments(function_call.name, dict(function_call.args or {}))
+
+    async def resolve_function_calls(self, query: str, intents: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Parameterize the functions of several detected intents with at most one model call.
+
+        Gemini may return one function call per intent; intents it skips reuse
+        same-named arguments from the other calls, e.g. a shared product_name,
+        so each detected intent is answered.
+        """
+        arguments: Dict[str, Dict[str, Any]] = {}
+        if any(self.function_declarations[name].parameters is not None for name in intents):
+            config = types.GenerateContentConfig(
+                tools=[types.Tool(function_declarations=[self.function_declarations[name] for name in intents])],
+                tool_config=types.ToolConfig(
+                    function_calling_config=types.FunctionCallingConfig(
+                        mode=types.FunctionCallingConfigMode.ANY,
+                        allowed_function_names=intents
+                    )
+                )
+            )
+            response = await self.client.generate_content(
+                contents=query,
+                model="gemini-2.0-flash",
+                config=config,
+            )
+            for function_call in response.function_calls or []:
+                if function_call.name in intents and function_call.name not in arguments:
+                    arguments[function_call.name] = self._clean_arguments(function_call.name, dict(function_call.args or {}))
+
+        shared: Dict[str, Any] = {}
+        for function_arguments in arguments.values():
+            for argument, value in function_arguments.items():
+                if value not in ("", None):
+                    shared.setdefault(argument, value)
+        return [
+            (name, arguments[name] if name in arguments else self._clean_arguments(name, shared))
+            for name in intents
+        ]
+
+    def _default_arguments(self, function_name: str) -> Dict[str, Any]:
+        parameters = self.function_declarations[function_name].parameters
+        return {name: "" for name in (parameters.required or [])} if parameters else {}
+
+    def _clean_arguments(self, function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop unknown arguments and fill missing required ones"""
+        parameters = self.function_declarations[function_name].parameters
+        if parameters is None:
             return {}
-        except (json.JSONDecodeError, AttributeError):
-            # Return empty dict with required params if parsing fails
-            return {param: "" for param in required_params} if required_params else {}
-
+        cleaned = {name: value for name, value in arguments.items() if name in parameters.properties}
+        for name in parameters.required or []:
+            cleaned.setdefault(name, "")
+        return cleaned
+    
     async def call_function(self, function_name: str, parameters: Dict[str, Any], user_id: str | None) -> Any:
         """Gọi hàm tương ứng với tên hàm và tham số."""
         if function_name == "unknown":
             self.unknown_function = "Sorry, I couldn't understand your request. Could you please rephrase it or ask something else?"
             return self.unknown_function
 
-        function_map = {
-            "greeting": self.greeting,
-            "product_search": self.product_search,
-            "product_information_inquiry": self.product_information_inquiry,
-            "product_dimensions": self.product_dimensions,
-            "product_material": self.product_material,
-            "product_color": self.product_color, 
-            "interior_design_advice": self.interior_design_advice,
-            "color_matching_advice": self.color_matching_advice,
-            "price_inquiry": self.price_inquiry,
-            "discount_inquiry": self.discount_inquiry,
-            "order_status": self.order_status,
-            "return_policy": self.return_policy,
-            "shipping_inquiry": self.shipping_inquiry,
-            "payment_methods": self.payment_methods,
-            "product_availability": self.product_availability,
-            "thank_you": self.thank_you,
-            "goodbye": self.goodbye
-        }
+        function_map = self.function_map()
 
         if function_name == "order_status":
             parameters["user_id"] = user_id
@@ -302,8 +396,11 @@ Return only valid JSON, no additional text."""
         return json.dumps({"advice": f"Providing color matching advice for: {base_elements} in {style} style with atmosphere: {atmosphere}"}, indent=2)
 
     async def price_inquiry(self, product_name: str) -> str:
+        """Hàm tra cứu giá sản phẩm.
+
+        product_name: tên sản phẩm cần tra giá, ví dụ "bàn gỗ sồi".
+        """
         search_results = await self.variant_service.search_variants(product_name, n_results=1)
-        """Hàm tra cứu giá sản phẩm."""
         if not search_results:
             return json.dumps({"error": "No price information found for the specified product."}, indent=2)
         # Convert search results to JSON format
@@ -312,8 +409,18 @@ Return only valid JSON, no additional text."""
         return json.dumps({"product_name": product_name, "price": price}, indent=2)
 
     async def discount_inquiry(self, name: str = "", code: str = "", description: str = "", customer_level: str = "", is_active: bool = True, start_date: str = "", end_date: str = "", discount_percentage: float = 0.0) -> str:
+        """Hàm tra cứu thông tin khuyến mãi. Mọi tham số đều không bắt buộc.
+
+        name: tên chương trình khuyến mãi.
+        code: mã giảm giá khách hàng nhập.
+        description: mô tả hoặc sản phẩm được áp dụng.
+        customer_level: hạng khách hàng được áp dụng, ví dụ "VIP".
+        is_active: chỉ tìm khuyến mãi đang diễn ra.
+        start_date: ngày bắt đầu, định dạng YYYY-MM-DD.
+        end_date: ngày kết thúc, định dạng YYYY-MM-DD.
+        discount_percentage: phần trăm giảm giá.
+        """
         from src.services.promotion_service import PromotionService
-        """Hàm tra cứu thông tin khuyến mãi."""
         promotion_service = PromotionService()
         # Build the search query from all provided parameters
         query = " ".join(filter(None, [
@@ -321,13 +428,14 @@ Return only valid JSON, no additional text."""
             code,
             description,
             customer_level,
-            str(is_active) if isinstance(is_active, bool) else is_active,
             start_date,
             end_date, 
             str(discount_percentage) if discount_percentage else ""
         ]))
 
-        promotions = await promotion_service.search_promotions(query=query, n_results=5)
+        # Active state is a metadata filter, not part of the embedded text
+        filters = {"is_active": is_active} if isinstance(is_active, bool) else None
+        promotions = await promotion_service.search_promotions(query=query or "promotion", n_results=5, filters=filters)
         if not promotions:
             return json.dumps({"error": "No promotions found."}, indent=2)
         return json.dumps(promotions, indent=2)
@@ -0,0 +1,284 @@
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+from src.monitoring.metrics import LatencyHistogram, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Intents whose answers depend on who is asking; cached per user only
+USER_SPECIFIC_INTENTS = ("order_status", "shipping_inquiry")
+
+# Catalog entities each intent's answer is built from, used for invalidation
+INTENT_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "product_search": ("product", "variant"),
+    "product_information_inquiry": ("product", "variant"),
+    "product_dimensions": ("product", "variant"),
+    "product_material": ("product", "variant"),
+    "product_color": ("product", "variant"),
+    "price_inquiry": ("product", "variant", "promotion"),
+    "product_availability": ("product", "variant"),
+    "discount_inquiry": ("promotion",),
+    "order_status": ("order",),
+    "shipping_inquiry": ("order",),
+    "interior_design_advice": (),
+    "color_matching_advice": ()
+}
+
+# (intent, user scope, locale, function arguments)
+ScopeKey = Tuple[str, Optional[str], str, str]
+
+
+@dataclass
+class CachedResponse:
+    id: int
+    text: str
+    compute_ms: float
+    expires_at: Optional[float]
+
+
+class _Scope:
+    """Normalized query vectors and their responses for one scope.
+
+    Rows live in a preallocated matrix that doubles when full, and removal
+    moves the last row into the freed slot, so add and remove are O(1)
+    amortized instead of copying the matrix.
+    """
+
+    def __init__(self, dimension: int, capacity: int = 16):
+        self._matrix = np.empty((capacity, dimension), dtype=np.float32)
+        self._expires = np.empty(capacity, dtype=np.float64)
+        self.entries: List[CachedResponse] = []
+        # Entry id -> row
+        self._rows: Dict[int, int] = {}
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:len(self.entries)]
+
+    def add(self, vector: np.ndarray, entry: CachedResponse) -> None:
+        size = len(self.entries)
+        if size == self._matrix.shape[0]:
+            matrix = np.empty((size * 2, self._matrix.shape[1]), dtype=np.float32)
+            matrix[:size] = self._matrix
+            expires = np.empty(size * 2, dtype=np.float64)
+            expires[:size] = self._expires
+            self._matrix, self._expires = matrix, expires
+        self._matrix[size] = vector
+        self._expires[size] = entry.expires_at if entry.expires_at is not None else np.inf
+        self._rows[entry.id] = size
+        self.entries.append(entry)
+
+    def remove(self, entry_ids: set) -> None:
+        for entry_id in entry_ids:
+            row = self._rows.pop(entry_id, None)
+            if row is None:
+                continue
+            last = len(self.entries) - 1
+            if row != last:
+                moved = self.entries[last]
+                self.entries[row] = moved
+                self._matrix[row] = self._matrix[last]
+                self._expires[row] = self._expires[last]
+                self._rows[moved.id] = row
+            self.entries.pop()
+
+    def nearest(self, vector: np.ndarray, now: float) -> Tuple[Optional[CachedResponse], float]:
+        """Most similar entry that has not expired"""
+        size = len(self.entries)
+        if not size:
+            return None, 0.0
+        live = self._expires[:size] > now
+        if not live.any():
+            return None, 0.0
+        similarities = np.where(live, self.matrix @ vector, -np.inf)
+        best = int(np.argmax(similarities))
+        return self.entries[best], float(similarities[best])
+
+
+class SemanticResponseCache:
+    """Chat replies cached by query embedding, per intent and answer scope.
+
+    A lookup compares the normalized query vector against earlier queries in
+    the same (intent, user, locale, arguments) scope and returns the stored
+    reply when the cosine similarity clears the threshold. Scoping by the
+    resolved function arguments keeps "price of the oak table" from being
+    answered with the oak chair's reply. Replies to user-specific intents are
+    only ever shared within one user_id. Catalog sync events invalidate the
+    scopes of intents built from the changed entity.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.threshold = threshold if threshold is not None else float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "600"))
+        self.ttl_seconds = ttl if ttl > 0 else None
+        self.max_entries = max_entries or int(os.getenv("SEMANTIC_CACHE_SIZE", "2000"))
+        self.enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+        self._scopes: Dict[ScopeKey, _Scope] = {}
+        # Entry id -> scope, oldest first, for LRU eviction
+        self._order: "OrderedDict[int, ScopeKey]" = OrderedDict()
+        # (expires_at, entry id, scope) in insertion order; the TTL is fixed, so also expiry order
+        self._expiry: "deque[Tuple[float, int, ScopeKey]]" = deque()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.latency_saved_ms = 0.0
+        self.lookup_latency = LatencyHistogram()
+
+    def scope_for(
+        self,
+        intent: str,
+        user_id: Optional[str],
+        locale: Optional[str],
+        arguments: Optional[Dict[str, Any]] = None
+    ) -> Optional[ScopeKey]:
+        """Scope a reply may be shared in, or None if it must not be cached"""
+        if not self.enabled or intent not in INTENT_DEPENDENCIES:
+            return None
+        arguments_key = json.dumps(arguments or {}, sort_keys=True, default=str)
+        if intent in USER_SPECIFIC_INTENTS:
+            if not user_id:
+                return None
+            return intent, str(user_id), locale or "", arguments_key
+        return intent, None, locale or "", arguments_key
+
+    @staticmethod
+    def _normalize(vector: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(self, scope: Optional[ScopeKey], embedding: Union[Sequence[float], np.ndarray]) -> Optional[str]:
+        """Return a cached reply for a similar query in scope"""
+        if scope is None:
+            return None
+        started_at = time.perf_counter()
+        vector = self._normalize(embedding)
+        with self._lock:
+            entry = None
+            similarity = 0.0
+            scope_index = self._scopes.get(scope)
+            if scope_index is not None:
+                entry, similarity = scope_index.nearest(vector, time.monotonic())
+
+            if entry is None or similarity < self.threshold:
+                self.misses += 1
+                text = None
+            else:
+                self.hits += 1
+                self.latency_saved_ms += entry.compute_ms
+                self._order.move_to_end(entry.id)
+                text = entry.text
+        self.lookup_latency.observe((time.perf_counter() - started_at) * 1000)
+        return text
+
+    def put(
+        self,
+        scope: Optional[ScopeKey],
+        embedding: Union[Sequence[float], np.ndarray],
+        text: str,
+        compute_ms: float
+    ) -> None:
+        """Store a reply computed in compute_ms"""
+        if scope is None or not text:
+            return
+        vector = self._normalize(embedding)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._sweep_expired()
+            scope_index = self._scopes.get(scope)
+            if scope_index is None:
+                scope_index = self._scopes[scope] = _Scope(vector.shape[0])
+            entry = CachedResponse(id=next(self._ids), text=text, compute_ms=compute_ms, expires_at=expires_at)
+            scope_index.add(vector, entry)
+            self._order[entry.id] = scope
+            if expires_at is not None:
+                self._expiry.append((expires_at, entry.id, scope))
+            self.stores += 1
+
+            while len(self._order) > self.max_entries:
+                entry_id, oldest_scope = self._order.popitem(last=False)
+                self._scopes[oldest_scope].remove({entry_id})
+                if not self._scopes[oldest_scope].entries:
+                    del self._scopes[oldest_scope]
+                self.evictions += 1
+
+    def _sweep_expired(self) -> None:
+        """Drop expired entries, oldest first; ids already evicted or invalidated are skipped"""
+        now = time.monotonic()
+        while self._expiry and self._expiry[0][0] <= now:
+            _, entry_id, scope = self._expiry.popleft()
+            if entry_id in self._order:
+                self._remove(scope, {entry_id})
+                self.expirations += 1
+
+    def _remove(self, scope: ScopeKey, entry_ids: set) -> None:
+        self._scopes[scope].remove(entry_ids)
+        for entry_id in entry_ids:
+            self._order.pop(entry_id, None)
+        if not self._scopes[scope].entries:
+            del self._scopes[scope]
+
+    def invalidate(self, entity: str, user_id: Optional[str] = None) -> None:
+        """Drop replies built from an entity; user_id narrows user-specific scopes"""
+        with self._lock:
+            for scope in list(self._scopes):
+                intent, scope_user, _, _ = scope
+                if entity not in INTENT_DEPENDENCIES.get(intent, ()):
+                    continue
+                if user_id is not None and scope_user is not None and scope_user != str(user_id):
+                    continue
+                entries = self._scopes[scope].entries
+                self.invalidations += len(entries)
+                self._remove(scope, {entry.id for entry in entries})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+            self._order.clear()
+            self._expiry.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size, hit rate and latency saved"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._order),
+            "max_entries": self.max_entries,
+            "scopes": len(self._scopes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "latency_saved_ms": round(self.latency_saved_ms, 1),
+            "avg_latency_saved_ms": round(self.latency_saved_ms / self.hits, 1) if self.hits else 0.0,
+            "lookup_latency": self.lookup_latency.snapshot()
+        }
+
+
+semantic_response_cache = SemanticResponseCache()
+metrics_registry.register("semantic_cache", semantic_response_cache.get_stats)
@@ -0,0 +1,111 @@
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+import logging
+import os
+import time
+
+from src.monitoring.metrics import LatencyHistogram, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Intents whose answer does not depend on the query or the user
+STATIC_INTENTS = ("greeting", "return_policy", "payment_methods", "thank_you", "goodbye")
+
+DEFAULT_LOCALE = os.getenv("CHAT_DEFAULT_LOCALE", "en")
+
+# Pre-written replies in the assistant's voice, per locale
+CANNED_RESPONSES: Dict[str, Dict[str, str]] = {
+    "en": {
+        "greeting": "Hi there, I'm Roomie from DearHome! I'd love to help you find pieces that make your home feel just right. What are you looking for today?",
+        "return_policy": "No worries if something isn't quite right: you can return any product within 30 days of purchase for a full refund, as long as it's in its original condition and packaging.",
+        "payment_methods": "You can pay by QR Payment or choose Cash on Delivery, whichever suits you best.",
+        "thank_you": "You're very welcome! If anything else comes to mind for your home, I'm right here.",
+        "goodbye": "Goodbye, and happy decorating! Come back any time you need a little design inspiration."
+    },
+    "vi": {
+        "greeting": "Xin chào, mình là Roomie của DearHome! Mình rất vui được giúp bạn tìm những món đồ khiến ngôi nhà thêm ấm cúng. Hôm nay bạn đang tìm gì nhỉ?",
+        "return_policy": "Bạn yên tâm nhé: mọi sản phẩm đều có thể đổi trả trong vòng 30 ngày kể từ khi mua để được hoàn tiền đầy đủ, miễn là sản phẩm còn nguyên trạng và nguyên bao bì.",
+        "payment_methods": "Bạn có thể thanh toán bằng QR hoặc thanh toán khi nhận hàng (COD), tùy bạn thấy tiện nhé.",
+        "thank_you": "Không có gì đâu! Nếu bạn cần thêm gợi ý gì cho ngôi nhà, cứ nhắn mình nhé.",
+        "goodbye": "Tạm biệt bạn, chúc bạn trang trí thật vui! Khi cần thêm cảm hứng thiết kế, cứ quay lại với mình nhé."
+    }
+}
+
+
+class StaticResponses:
+    """Fast-path replies for static intents that skip the LLM.
+
+    Locales with a canned reply are answered from CANNED_RESPONSES. Other
+    locales are rendered by the LLM once and the rendering is cached per
+    (intent, locale) for ttl_seconds.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, min_confidence: Optional[float] = None):
+        ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("STATIC_RESPONSE_TTL_SECONDS", "86400"))
+        self.ttl_seconds = ttl if ttl > 0 else None
+        self.min_confidence = min_confidence if min_confidence is not None else float(
+            os.getenv("STATIC_INTENT_MIN_CONFIDENCE", "0.8")
+        )
+        self._renderings: Dict[Tuple[str, str], Tuple[str, Optional[float]]] = {}
+
+        self.canned_hits = 0
+        self.rendered_hits = 0
+        self.renders = 0
+        self.latency = LatencyHistogram()
+
+    @staticmethod
+    def normalize_locale(locale: Optional[str]) -> str:
+        """Reduce a locale such as 'vi-VN' to its language code"""
+        return (locale or DEFAULT_LOCALE).replace("_", "-").split("-")[0].lower()
+
+    def handles(self, intent: str, confidence: float) -> bool:
+        """Whether an intent classified with this confidence takes the fast path"""
+        return intent in STATIC_INTENTS and confidence >= self.min_confidence
+
+    async def respond(self, intent: str, locale: Optional[str], render: Callable[[], Awaitable[str]]) -> str:
+        """Return the reply for a static intent, rendering it once if no canned text exists"""
+        started_at = time.perf_counter()
+        locale = self.normalize_locale(locale)
+
+        text = CANNED_RESPONSES.get(locale, {}).get(intent)
+        if text is not None:
+            self.canned_hits += 1
+        else:
+            text = self._get_rendering(intent, locale)
+            if text is not None:
+                self.rendered_hits += 1
+            else:
+                self.renders += 1
+                text = await render()
+                expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+                self._renderings[(intent, locale)] = (text, expires_at)
+
+        self.latency.observe((time.perf_counter() - started_at) * 1000)
+        return text
+
+    def _get_rendering(self, intent: str, locale: str) -> Optional[str]:
+        entry = self._renderings.get((intent, locale))
+        if entry is None:
+            return None
+        text, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._renderings[(intent, locale)]
+            return None
+        return text
+
+    def clear(self) -> None:
+        self._renderings.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fast-path counters"""
+        return {
+            "min_confidence": self.min_confidence,
+            "cached_renderings": len(self._renderings),
+            "canned_hits": self.canned_hits,
+            "rendered_hits": self.rendered_hits,
+            "renders": self.renders,
+            "latency": self.latency.snapshot()
+        }
+
+
+static_responses = StaticResponses()
+metrics_registry.register("static_responses", static_responses.get_stats)
@@ -0,0 +1,6 @@
+"""
+Monitoring module for Business Interior Design Chatbot
+Contains in-process metrics collected by services and exposed on the metrics endpoint
+"""
+
+from src.monitoring.metrics import LatencyHistogram, metrics_registry
@@ -0,0 +1,117 @@
+from typing import Dict, Any, Callable, Optional, Sequence, Set
+import asyncio
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the default latency buckets
+DEFAULT_LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """Thread-safe cumulative latency histogram with fixed millisecond buckets"""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        """Record a single latency sample in milliseconds"""
+        index = bisect.bisect_left(self.buckets_ms, value_ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum_ms += value_ms
+            if value_ms > self._max_ms:
+                self._max_ms = value_ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket containing it"""
+        with self._lock:
+            if self._count == 0:
+                return None
+            target = q * self._count
+            running = 0
+            for index, count in enumerate(self._counts):
+                running += count
+                if running >= target:
+                    return self.buckets_ms[index] if index < len(self.buckets_ms) else self._max_ms
+            return self._max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get count, average, max, estimated p50/p95/p99 and per-bucket counts"""
+        p50, p95, p99 = self.quantile(0.5), self.quantile(0.95), self.quantile(0.99)
+        with self._lock:
+            buckets = {f"le_{bound:g}": count for bound, count in zip(self.buckets_ms, self._counts)}
+            buckets["le_inf"] = self._counts[-1]
+            return {
+                "count": self._count,
+                "avg_ms": round(self._sum_ms / self._count, 3) if self._count else 0.0,
+                "max_ms": round(self._max_ms, 3),
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "buckets": buckets
+            }
+
+
+class MetricsRegistry:
+    """Collects named metric providers so they can be exposed on one endpoint"""
+
+    def __init__(self):
+        self._providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        # Providers that do blocking I/O; collect_async runs them in a worker thread
+        self._blocking: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def register(self, name: str, provider: Callable[[], Dict[str, Any]], blocking: bool = False) -> None:
+        """Register (or replace) a callable returning a metrics snapshot"""
+        with self._lock:
+            self._providers[name] = provider
+            if blocking:
+                self._blocking.add(name)
+            else:
+                self._blocking.discard(name)
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._providers.pop(name, None)
+            self._blocking.discard(name)
+
+    @staticmethod
+    def _snapshot(name: str, provider: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return provider()
+        except Exception as e:
+            logger.error(f"Error collecting metrics for {name}: {e}")
+            return {"error": str(e)}
+
+    def collect(self) -> Dict[str, Any]:
+        """Get a snapshot from every registered provider"""
+        with self._lock:
+            providers = list(self._providers.items())
+
+        return {name: self._snapshot(name, provider) for name, provider in providers}
+
+    async def collect_async(self) -> Dict[str, Any]:
+        """Like collect, but runs blocking providers in a worker thread"""
+        with self._lock:
+            providers = list(self._providers.items())
+            blocking = set(self._blocking)
+
+        snapshot = {}
+        for name, provider in providers:
+            if name in blocking:
+                snapshot[name] = await asyncio.to_thread(self._snapshot, name, provider)
+            else:
+                snapshot[name] = self._snapshot(name, provider)
+        return snapshot
+
+
+metrics_registry = MetricsRegistry()
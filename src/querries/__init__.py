@@ -0,0 +1,4 @@
+"""
+Query module for Business Interior Design Chatbot
+Contains read-side SQL queries used by the services
+"""
@@ -0,0 +1,108 @@
+from typing import Dict, List, Any, Optional, Tuple
+import json
+import logging
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from src.database.db_connection import get_async_sessionmaker
+from src.database.models import AttributeValues, Products, VariantAttributes, Variants
+from src.database.payloads import variant_to_payload
+from src.services.variant_detail_cache import VariantDetailCache, variant_detail_cache
+
+logger = logging.getLogger(__name__)
+
+
+class VariantQueries:
+    """Read-through lookups of variant details with product, category and attributes"""
+
+    def __init__(self, cache: Optional[VariantDetailCache] = None):
+        self.cache = cache or variant_detail_cache
+
+    @staticmethod
+    def serialize(payload: Dict[str, Any]) -> str:
+        """Serialize variant details the way they are embedded in prompts"""
+        return json.dumps(payload, indent=2, ensure_ascii=False)
+
+    async def _load(self, ids: List[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Load and serialize the given variants with a single IN query; returns blobs and product ids"""
+        variant_ids = []
+        for variant_id in ids:
+            try:
+                variant_ids.append(uuid.UUID(variant_id))
+            except ValueError:
+                logger.warning(f"Skipping invalid variant id {variant_id}")
+        if not variant_ids:
+            return {}, {}
+
+        session_factory = get_async_sessionmaker()
+        if session_factory is None:
+            raise ConnectionError("Failed to create database engine")
+
+        # Joined eager loads keep this to one round trip for the whole batch
+        statement = (
+            select(Variants)
+            .where(Variants.Id.in_(variant_ids))
+            .options(
+                joinedload(Variants.Products_).joinedload(Products.Categories_),
+                joinedload(Variants.VariantAttributes)
+                .joinedload(VariantAttributes.AttributeValues_)
+                .joinedload(AttributeValues.Attributes_)
+            )
+        )
+        async with session_factory() as session:
+            result = await session.execute(statement)
+            variants = result.unique().scalars().all()
+            blobs, product_ids = {}, {}
+            for variant in variants:
+                payload = variant_to_payload(variant)
+                variant_id = str(variant.Id).lower()
+                blobs[variant_id] = self.serialize(payload)
+                product_ids[variant_id] = payload["product_id"]
+            return blobs, product_ids
+
+    async def get_variant_details_json(self, ids: List[str]) -> Dict[str, Any]:
+        """
+        Get serialized variant details in the order requested.
+
+        Cached variants are served from memory; only the misses are queried.
+
+        Returns:
+            Dictionary containing:
+                - success: bool indicating if operation was successful
+                - result: List of JSON strings, one per variant found
+                - error: Error message if unsuccessful
+        """
+        found, missing = self.cache.get_many(ids)
+        if missing:
+            # Read before loading so details invalidated mid-load are not cached
+            generation = self.cache.generation
+            try:
+                loaded, product_ids = await self._load(missing)
+            except Exception as e:
+                logger.error(f"Failed to fetch variant details: {e}")
+                return {"success": False, "error": f"Failed to fetch variant details: {str(e)}"}
+            self.cache.put_many(loaded, product_ids=product_ids, generation=generation)
+            found.update(loaded)
+
+        ordered = list(dict.fromkeys(self.cache.normalize(variant_id) for variant_id in ids))
+        return {
+            "success": True,
+            "result": [found[variant_id] for variant_id in ordered if variant_id in found]
+        }
+
+    async def get_variants_with_details(self, ids: List[str]) -> Dict[str, Any]:
+        """
+        Get variant details as dictionaries in the order requested.
+
+        Returns:
+            Dictionary containing:
+                - success: bool indicating if operation was successful
+                - result: List of variant detail dictionaries
+                - error: Error message if unsuccessful
+        """
+        details = await self.get_variant_details_json(ids)
+        if not details.get("success"):
+            return details
+        return {"success": True, "result": [json.loads(blob) for blob in details["result"]]}
@@ -16,8 +16,48 @@ logger = logging.getLogger(__name__)
 
 websocket_manager = ConnectionManager()
 
+async def stream_response(websocket: WebSocket, client_id: str, query: str, user_id: str, lang: str | None = None):
+    """Send the reply as delta frames followed by a done frame with usage stats.
+
+    A failure while generating ends the reply with an error frame instead,
+    and the connection stays open for the next message.
+    """
+    try:
+        async for event in chatbot_manager.stream_query(query, user_id=user_id, locale=lang):
+            if event["type"] == "delta":
+                message = {
+                    "type": "delta",
+                    "client_id": client_id,
+                    "delta": event["text"],
+                }
+            else:
+                message = {
+                    "type": "done",
+                    "client_id": client_id,
+                    "response": event["text"],
+                    "usage": event["usage"],
+                    "timestamp": datetime.now().isoformat(),
+                }
+            await websocket_manager.send_personal_message(message, websocket)
+    except WebSocketDisconnect:
+        raise
+    except Exception as e:
+        logger.error(f"Streaming reply for client {client_id} failed: {str(e)}")
+        logger.debug(traceback.format_exc())
+        await websocket_manager.send_personal_message({
+            "type": "error",
+            "client_id": client_id,
+            "error": "Sorry, something went wrong while answering. Please try again.",
+            "timestamp": datetime.now().isoformat(),
+        }, websocket)
+
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, current_user_id: str = Depends(get_current_user_ws)):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    stream: bool = False,
+    lang: str | None = None,
+    current_user_id: str = Depends(get_current_user_ws)
+):
 # async def websocket_endpoint(websocket: WebSocket):
 
     client_id = str(uuid.uuid4())
@@ -41,9 +81,14 @@ async def websocket_endpoint(websocket: WebSocket, current_user_id: str = Depend
             data = await websocket.receive_text()
             logger.info(f"Received message from client {client_id}: {data}")
             
+            if stream:
+                # Token streaming: the client renders deltas as they arrive
+                await stream_response(websocket, client_id, data, current_user_id, lang=lang)
+                continue
+
             # Process the incoming message
             # response = generate_response(data, current_user)
-            response = await chatbot_manager.process_query(data, user_id=current_user_id)
+            response = await chatbot_manager.process_query(data, user_id=current_user_id, locale=lang)
 
             # Send the response back to the client
             message = {
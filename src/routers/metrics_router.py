@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+import logging
+from src.monitoring.metrics import metrics_registry
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+@router.get("")
+async def get_metrics():
+    """Return a snapshot of all registered in-process metrics"""
+    return await metrics_registry.collect_async()
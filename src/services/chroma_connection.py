@@ -2,14 +2,32 @@ from typing import Optional, Dict
 from pathlib import Path
 import chromadb
 from chromadb.config import Settings
-from chromadb.utils import embedding_functions
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 from chromadb.api.models.Collection import Collection
 from src.config.chroma_config import ChromaConfig
+from src.services.embedding_registry import embedding_model_registry
 from contextlib import contextmanager
 import logging
 
 logger = logging.getLogger(__name__)
 
+class SharedSentenceTransformerEmbeddingFunction(EmbeddingFunction):
+    """Chroma embedding function backed by the process-wide model registry"""
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        self.model_name = model_name
+        self.device = device
+        self._model = embedding_model_registry.acquire(model_name, device)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self._model.encode(list(input), convert_to_numpy=True).tolist()
+
+    def release(self) -> None:
+        """Return the model reference to the registry"""
+        if self._model is not None:
+            self._model = None
+            embedding_model_registry.release(self.model_name, self.device)
+
 class ChromaConnectionManager:
     """Manages ChromaDB client connections and collection access"""
     
@@ -17,6 +35,7 @@ class ChromaConnectionManager:
         self.config = config
         self._client = None
         self._collections: Dict[str, Collection] = {}
+        self._embedding_functions: Dict[str, SharedSentenceTransformerEmbeddingFunction] = {}
         
     @property
     def client(self):
@@ -37,13 +56,17 @@ class ChromaConnectionManager:
         if collection_name not in self._collections:
             try:
                 collection_config = self.config.collections[collection_name]
-                self._collections[collection_name] = self.client.get_or_create_collection(
-                    name=collection_config.name,
-                    metadata={"description": collection_config.description},
-                    embedding_function=embedding_functions.SentenceTransformerEmbeddingFunction(
+                embedding_function = self._embedding_functions.get(collection_name)
+                if embedding_function is None:
+                    embedding_function = SharedSentenceTransformerEmbeddingFunction(
                         model_name=collection_config.embedding_model,
                         device=collection_config.device
                     )
+                    self._embedding_functions[collection_name] = embedding_function
+                self._collections[collection_name] = self.client.get_or_create_collection(
+                    name=collection_config.name,
+                    metadata={"description": collection_config.description},
+                    embedding_function=embedding_function
                 )
                 logger.info(f"Connected to collection: {collection_name}")
             except KeyError:
@@ -72,6 +95,9 @@ class ChromaConnectionManager:
             self._client = None
             self._collections.clear()
             logger.info("Closed ChromaDB connection")
+        for embedding_function in self._embedding_functions.values():
+            embedding_function.release()
+        self._embedding_functions.clear()
     
     @contextmanager
     def collection_context(self, collection_name: str):
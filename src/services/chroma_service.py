@@ -7,9 +7,13 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple, Union
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from src.config.chroma_config import ChromaConfig
+from src.core.backoff import backoff_delay
 from src.services.chroma_connection import ChromaConnectionManager
+from src.services.embedding_registry import embedding_model_registry
+from src.services.embedding_batcher import embedding_batcher
+from src.services.embedding_cache import embedding_cache
+from src.services.embedding_executor import embedding_executor
 from src.models.search_result import SearchResultFormatter, SearchResults
 from src.exceptions.chroma_exceptions import *
 import logging
@@ -18,16 +22,21 @@ from functools import wraps
 import os
 from pathlib import Path
 import json
+import hashlib
 
 from src.models.product import ProductMetadata
 from src.models.variant import VariantMetadata
 
 logger = logging.getLogger(__name__)
 
-def retry_on_error(max_retries: int = 3, delay: float = 1.0):
+# Metadata key holding the hash of the text a document's embedding was built from
+EMBEDDING_HASH_KEY = "_embedding_hash"
+
+def retry_on_error(max_retries: int = 3, delay: float = 0.2, max_delay: float = 2.0):
     """
     Decorator for retrying operations on failure.
-    This version is async-aware.
+    This version is async-aware and backs off exponentially with jitter;
+    longer outages are left to the sync handlers' retry scheduler.
     """
     def decorator(func):
         @wraps(func)
@@ -40,12 +49,13 @@ def retry_on_error(max_retries: int = 3, delay: float = 1.0):
                 except Exception as e:
                     last_error = e
                     if attempt < max_retries - 1:
+                        wait = backoff_delay(attempt + 1, delay, max_delay)
                         logger.warning(
                             f"Attempt {attempt + 1} of {max_retries} for {func.__name__} failed, "
-                            f"retrying in {delay}s: {str(e)}"
+                            f"retrying in {wait:.2f}s: {str(e)}"
                         )
                         # 3. Dùng asyncio.sleep thay vì time.sleep để không block event loop
-                        await asyncio.sleep(delay)
+                        await asyncio.sleep(wait)
                     else:
                         logger.error(f"All {max_retries} attempts for {func.__name__} failed.")
             raise last_error
@@ -66,9 +76,11 @@ class ChromaService:
         
         # Get collection config
         collection_config = self.config.collections[self.collection_name]
+        self.embedding_model_name = collection_config.embedding_model
+        self.device = collection_config.device
         
-        # Initialize model and formatter
-        self.model = SentenceTransformer(collection_config.embedding_model, device=collection_config.device)
+        # Initialize model (shared across services) and formatter
+        self.model = embedding_model_registry.acquire(self.embedding_model_name, self.device)
         self.formatter = SearchResultFormatter()
         
         # Initialize connection manager
@@ -119,10 +131,18 @@ class ChromaService:
         
         return search_results
 
-    def _generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for input text"""
+    async def _generate_embedding(self, text: str) -> List[float]:
+        """Generate embedding for input text, served from cache or batched with concurrent requests"""
         try:
-            return self.model.encode(text).tolist()
+            return await embedding_cache.get_or_compute(
+                self.embedding_model_name,
+                text,
+                lambda: embedding_batcher.embed(
+                    text,
+                    model_name=self.embedding_model_name,
+                    device=self.device
+                )
+            )
         except Exception as e:
             raise ChromaQueryError(f"Error generating embedding: {str(e)}")
     
@@ -135,7 +155,7 @@ class ChromaService:
         """Search for items in the vector database"""
         try:
             # Generate embedding for query
-            query_embedding = self._generate_embedding(query)
+            query_embedding = await self._generate_embedding(query)
             
             # Use collection directly since ChromaDB operations are synchronous
             results = self.collection.query(
@@ -181,7 +201,7 @@ class ChromaService:
         """Search for items with optional filters"""
         try:
             # Generate embedding for query
-            query_embedding = self._generate_embedding(query)
+            query_embedding = await self._generate_embedding(query)
             
             # Use collection directly since ChromaDB operations are synchronous
             results = self.collection.query(
@@ -228,9 +248,8 @@ class ChromaService:
         """Update a document in the vector database"""
         try:
             with self.connection.collection_context(self.collection_name) as collection:
-                embedding = self._generate_embedding(embedding_text) if embedding_text else None
-                if metadata is not None:
-                    metadata = self._flatten_metadata(metadata)
+                embedding = await self._generate_embedding(embedding_text) if embedding_text else None
+                metadata = self._prepare_metadata(metadata, embedding_text)
                 collection.upsert(
                     ids=[id],
                     embeddings=[embedding],
@@ -249,12 +268,23 @@ class ChromaService:
         metadata: Optional[Dict[str, Any]] = None,
         embedding_text: Optional[str] = None
     ) -> None:
-        """Update a document in the vector database"""
+        """Update a document in the vector database.
+
+        The embedding is only recomputed when the hash of embedding_text differs
+        from the one stored with the document; otherwise (or when no
+        embedding_text is given) only the metadata is written.
+        """
         try:
             with self.connection.collection_context(self.collection_name) as collection:
-                embedding = self._generate_embedding(embedding_text) if embedding_text else None
-                if metadata is not None:
-                    metadata = self._flatten_metadata(metadata)
+                metadata = self._prepare_metadata(metadata, embedding_text)
+
+                if embedding_text is None or self._get_embedding_hashes(collection, [id]).get(id) == metadata[EMBEDDING_HASH_KEY]:
+                    if metadata is not None:
+                        collection.update(ids=[id], metadatas=[metadata])
+                    logger.info(f"Updated metadata of document {id} without re-embedding")
+                    return True
+
+                embedding = await self._generate_embedding(embedding_text)
                 collection.upsert(
                     ids=[id],
                     embeddings=[embedding],
@@ -265,6 +295,134 @@ class ChromaService:
                 return True
         except Exception as e:
             raise ChromaUpdateError(f"Error updating document: {str(e)}")
+
+    @retry_on_error()
+    async def upsert_many(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Insert or update many documents, chunked by config.batch_size.
+        
+        Args:
+            items: Dicts with 'id' and optional 'metadata' and 'embedding_text'
+            
+        Returns:
+            Dict[str, int]: Number of documents re-embedded and updated metadata-only
+        """
+        summary = {"embedded": 0, "metadata_only": 0}
+        try:
+            with self.connection.collection_context(self.collection_name) as collection:
+                for start in range(0, len(items), self.config.batch_size):
+                    chunk = items[start:start + self.config.batch_size]
+                    chunk_summary = await self._upsert_chunk(collection, chunk)
+                    summary["embedded"] += chunk_summary["embedded"]
+                    summary["metadata_only"] += chunk_summary["metadata_only"]
+            logger.info(
+                f"Upserted {len(items)} documents into {self.collection_name} "
+                f"({summary['embedded']} embedded, {summary['metadata_only']} metadata-only)"
+            )
+            return summary
+        except Exception as e:
+            raise ChromaBatchError(f"Error upserting documents: {str(e)}")
+
+    async def _upsert_chunk(self, collection, chunk: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Write one chunk: one batched encode and one upsert for changed texts, one update for the rest"""
+        # Later items win if the same id appears twice in a chunk
+        prepared: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]] = {}
+        for item in chunk:
+            embedding_text = item.get('embedding_text')
+            prepared[str(item['id'])] = (self._prepare_metadata(item.get('metadata'), embedding_text), embedding_text)
+
+        existing_hashes = self._get_embedding_hashes(collection, list(prepared))
+
+        to_embed, metadata_only = [], []
+        for doc_id, (metadata, embedding_text) in prepared.items():
+            if doc_id in existing_hashes and (
+                embedding_text is None or existing_hashes[doc_id] == metadata[EMBEDDING_HASH_KEY]
+            ):
+                if metadata is not None:
+                    metadata_only.append((doc_id, metadata))
+            elif embedding_text is not None:
+                to_embed.append((doc_id, metadata, embedding_text))
+            else:
+                logger.warning(f"Skipping new document {doc_id} without embedding text")
+
+        if to_embed:
+            embeddings = await self._generate_embeddings([text for _, _, text in to_embed])
+            collection.upsert(
+                ids=[doc_id for doc_id, _, _ in to_embed],
+                embeddings=embeddings,
+                metadatas=[metadata for _, metadata, _ in to_embed]
+            )
+        if metadata_only:
+            collection.update(
+                ids=[doc_id for doc_id, _ in metadata_only],
+                metadatas=[metadata for _, metadata in metadata_only]
+            )
+
+        return {"embedded": len(to_embed), "metadata_only": len(metadata_only)}
+
+    async def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for many texts in a single encode call"""
+        try:
+            return await embedding_executor.embed(
+                texts,
+                model_name=self.embedding_model_name,
+                device=self.device,
+                batch_size=min(len(texts), self.config.batch_size)
+            )
+        except Exception as e:
+            raise ChromaQueryError(f"Error generating embeddings: {str(e)}")
+
+    @retry_on_error()
+    async def delete_many(self, ids: List[str]) -> int:
+        """Delete many documents, chunked by config.batch_size"""
+        try:
+            with self.connection.collection_context(self.collection_name) as collection:
+                for start in range(0, len(ids), self.config.batch_size):
+                    collection.delete(ids=ids[start:start + self.config.batch_size])
+            logger.info(f"Deleted {len(ids)} documents from {self.collection_name}")
+            return len(ids)
+        except Exception as e:
+            raise ChromaBatchError(f"Error deleting documents: {str(e)}")
+
+    async def get_metadata(self, id: str) -> Optional[Dict[str, Any]]:
+        """Get the stored metadata of a document, or None if it does not exist"""
+        return (await self.get_metadata_many([id])).get(id)
+
+    async def get_metadata_many(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the stored metadata of many documents in one read; missing ids are left out"""
+        try:
+            with self.connection.collection_context(self.collection_name) as collection:
+                result = collection.get(ids=ids, include=['metadatas'])
+                return {doc_id: metadata or {} for doc_id, metadata in zip(result['ids'], result['metadatas'])}
+        except Exception as e:
+            raise ChromaQueryError(f"Error fetching document metadata: {str(e)}")
+
+    @staticmethod
+    def _hash_embedding_text(embedding_text: str) -> str:
+        """Content hash of the text an embedding was generated from"""
+        return hashlib.sha256(embedding_text.encode("utf-8")).hexdigest()
+
+    def _prepare_metadata(
+        self,
+        metadata: Optional[Dict[str, Any]],
+        embedding_text: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Flatten metadata and stamp it with the embedding text hash"""
+        if metadata is not None:
+            metadata = self.flatten_metadata(metadata)
+        if embedding_text is not None:
+            metadata = dict(metadata or {})
+            metadata[EMBEDDING_HASH_KEY] = self._hash_embedding_text(embedding_text)
+        return metadata
+
+    @staticmethod
+    def _get_embedding_hashes(collection, ids: List[str]) -> Dict[str, Optional[str]]:
+        """Fetch the stored embedding text hashes for existing documents"""
+        result = collection.get(ids=ids, include=['metadatas'])
+        return {
+            doc_id: (metadata or {}).get(EMBEDDING_HASH_KEY)
+            for doc_id, metadata in zip(result['ids'], result['metadatas'])
+        }
     
     @retry_on_error()
     async def delete_documents(self, ids: List[str]) -> None:
@@ -283,8 +441,11 @@ class ChromaService:
     def close(self) -> None:
         """Close the service and its connections"""
         self.connection.close()
+        if self.model is not None:
+            self.model = None
+            embedding_model_registry.release(self.embedding_model_name, self.device)
 
-    def _flatten_metadata(self, metadata: Dict[str, Any], parent_key: str = '', sep: str = '.') -> Dict[str, Any]:
+    def flatten_metadata(self, metadata: Dict[str, Any], parent_key: str = '', sep: str = '.') -> Dict[str, Any]:
         """Flatten nested dictionary into dot notation and ensure values are primitive types"""
         items: List[Tuple[str, Any]] = []
         
@@ -293,7 +454,7 @@ class ChromaService:
             
             if isinstance(v, dict):
                 # Recursively flatten nested dictionaries
-                items.extend(self._flatten_metadata(v, new_key, sep=sep).items())
+                items.extend(self.flatten_metadata(v, new_key, sep=sep).items())
             elif isinstance(v, (list, tuple)):
                 # Convert lists to strings
                 items.append((new_key, json.dumps(v)))
@@ -0,0 +1,113 @@
+from typing import Dict, List, Any, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+
+from src.services.embedding_executor import EmbeddingExecutor, embedding_executor
+from src.monitoring.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+BatchKey = Tuple[str, str]
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text encode requests into batched encodes.
+
+    Requests for the same (model, device) are collected for up to
+    max_wait_ms or until max_batch_size texts are pending, encoded in one
+    call on the embedding executor, and the vectors are fanned back out to
+    the awaiting callers.
+    """
+
+    def __init__(
+        self,
+        executor: EmbeddingExecutor = embedding_executor,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        self.executor = executor
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+        self._pending: Dict[BatchKey, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[BatchKey, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.requests = 0
+        self.texts_encoded = 0
+        self.max_observed_batch = 0
+
+    async def embed(self, text: str, model_name: str = "all-MiniLM-L6-v2", device: str = "cpu") -> List[float]:
+        """Encode a single text as part of the next batch"""
+        loop = asyncio.get_running_loop()
+        key = (model_name, device)
+        future = loop.create_future()
+
+        pending = self._pending.setdefault(key, [])
+        pending.append((text, future))
+        self.requests += 1
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait_ms / 1000, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: BatchKey) -> None:
+        """Hand the pending requests for a key to a background encode task"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run_batch(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, key: BatchKey, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        model_name, device = key
+        # Identical texts in the same window are encoded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+
+        self.batches += 1
+        self.texts_encoded += len(unique_texts)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+
+        try:
+            vectors = await self.executor.embed(
+                unique_texts,
+                model_name=model_name,
+                device=device,
+                batch_size=len(unique_texts)
+            )
+        except Exception as e:
+            logger.error(f"Batched embedding of {len(unique_texts)} texts failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching efficiency metrics"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": sum(len(batch) for batch in self._pending.values()),
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts_encoded": self.texts_encoded,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_observed_batch": self.max_observed_batch
+        }
+
+
+embedding_batcher = EmbeddingBatcher()
+metrics_registry.register("embedding_batcher", embedding_batcher.get_stats)
@@ -0,0 +1,175 @@
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
+from collections import OrderedDict
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+
+from src.monitoring.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class EmbeddingCache:
+    """Bounded LRU cache of embeddings keyed by model name and normalized text.
+
+    Entries can expire after a TTL, and an optional SQLite file acts as a second
+    tier that survives restarts. Text is normalized with NFKC, whitespace
+    collapsing and case folding, which is safe for the uncased MiniLM models
+    configured in this project.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        disk_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "0"))
+        self.ttl_seconds = ttl if ttl > 0 else None
+        self.disk_path = disk_path or os.getenv("EMBEDDING_CACHE_DISK_PATH")
+
+        self._entries: "OrderedDict[CacheKey, Tuple[np.ndarray, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text so trivially different inputs share a cache entry"""
+        return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+    async def get_or_compute(
+        self,
+        model_name: str,
+        text: str,
+        compute: Callable[[], Awaitable[List[float]]]
+    ) -> List[float]:
+        """Return the cached embedding for text, computing and storing it on a miss"""
+        key = (model_name, self.normalize(text))
+
+        vector = self._get_memory(key)
+        if vector is not None:
+            self.hits += 1
+            return vector.tolist()
+
+        if self.disk_path:
+            vector = await asyncio.to_thread(self._get_disk, key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._put_memory(key, vector)
+                return vector.tolist()
+
+        self.misses += 1
+        embedding = await compute()
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._put_memory(key, vector)
+        if self.disk_path:
+            await asyncio.to_thread(self._put_disk, key, vector)
+        return embedding
+
+    def _get_memory(self, key: CacheKey) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            vector, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def _put_memory(self, key: CacheKey, vector: np.ndarray) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (vector, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _disk_key(key: CacheKey) -> str:
+        model_name, text = key
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _get_disk_connection(self) -> sqlite3.Connection:
+        if self._disk is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            self._disk = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._disk.commit()
+        return self._disk
+
+    def _get_disk(self, key: CacheKey) -> Optional[np.ndarray]:
+        try:
+            with self._disk_lock:
+                row = self._get_disk_connection().execute(
+                    "SELECT vector, created_at FROM embeddings WHERE key = ?",
+                    (self._disk_key(key),)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        if self.ttl_seconds and row[1] + self.ttl_seconds < time.time():
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _put_disk(self, key: CacheKey, vector: np.ndarray) -> None:
+        try:
+            with self._disk_lock:
+                connection = self._get_disk_connection()
+                connection.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    (self._disk_key(key), vector.astype(np.float32).tobytes(), time.time())
+                )
+                connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop every in-memory entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss counters"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": bool(self.disk_path),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+embedding_cache = EmbeddingCache()
+metrics_registry.register("embedding_cache", embedding_cache.get_stats)
@@ -0,0 +1,124 @@
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+from src.services.embedding_registry import embedding_model_registry
+from src.monitoring.metrics import LatencyHistogram, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingExecutor:
+    """Runs model.encode on a dedicated thread pool behind an awaitable API.
+
+    A thread pool is used rather than a process pool so every worker shares the
+    single model instance held by the embedding registry; the heavy parts of a
+    transformer forward pass release the GIL, so encodes run in parallel with
+    the event loop instead of blocking it.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("EMBEDDING_WORKERS", "2"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+        self.pending = 0
+        self.in_flight = 0
+        self.texts_encoded = 0
+        self.encode_latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Get or create the worker pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="embedding"
+            )
+            logger.info(f"Started embedding executor with {self.max_workers} workers")
+        return self._executor
+
+    def _get_model(self, model_name: str, device: str):
+        """Hold one registry reference per model for the lifetime of the executor"""
+        key = (model_name, device)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = embedding_model_registry.acquire(model_name, device)
+            return self._models[key]
+
+    def _encode(self, texts: List[str], model_name: str, device: str, batch_size: int, submitted_at: float) -> np.ndarray:
+        """Worker-side encode; runs in a pool thread"""
+        with self._lock:
+            self.pending -= 1
+            self.in_flight += 1
+        started_at = time.perf_counter()
+        self.queue_wait.observe((started_at - submitted_at) * 1000)
+        try:
+            model = self._get_model(model_name, device)
+            return model.encode(
+                texts,
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        finally:
+            self.encode_latency.observe((time.perf_counter() - started_at) * 1000)
+            with self._lock:
+                self.in_flight -= 1
+                self.texts_encoded += len(texts)
+
+    async def embed(
+        self,
+        texts: List[str],
+        model_name: str = "all-MiniLM-L6-v2",
+        device: str = "cpu",
+        batch_size: int = 32
+    ) -> List[List[float]]:
+        """Encode texts off the event loop and return one vector per text"""
+        if not texts:
+            return []
+        with self._lock:
+            self.pending += 1
+        loop = asyncio.get_running_loop()
+        embeddings = await loop.run_in_executor(
+            self.executor,
+            self._encode,
+            list(texts),
+            model_name,
+            device,
+            batch_size,
+            time.perf_counter()
+        )
+        return embeddings.tolist()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, throughput and latency metrics"""
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.pending,
+            "in_flight": self.in_flight,
+            "texts_encoded": self.texts_encoded,
+            "encode_latency": self.encode_latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot()
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool and release model references"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            for model_name, device in self._models:
+                embedding_model_registry.release(model_name, device)
+            self._models.clear()
+
+
+embedding_executor = EmbeddingExecutor()
+metrics_registry.register("embedding_executor", embedding_executor.get_stats)
@@ -0,0 +1,63 @@
+from typing import Dict, Tuple, Any
+import threading
+import logging
+from sentence_transformers import SentenceTransformer
+from src.monitoring.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str]
+
+
+class EmbeddingModelRegistry:
+    """Process-wide, reference-counted registry of SentenceTransformer models.
+
+    Every service that needs an embedding model acquires it here instead of
+    constructing its own instance, so a model is loaded once per
+    (model name, device) pair no matter how many services use it.
+    """
+
+    def __init__(self):
+        self._models: Dict[ModelKey, SentenceTransformer] = {}
+        self._refcounts: Dict[ModelKey, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model_name: str, device: str = "cpu") -> SentenceTransformer:
+        """Return the shared model for (model_name, device), loading it on first use"""
+        key = (model_name, device)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                logger.info(f"Loading embedding model {model_name} on {device}")
+                model = SentenceTransformer(model_name, device=device)
+                self._models[key] = model
+                self._refcounts[key] = 0
+            self._refcounts[key] += 1
+            return model
+
+    def release(self, model_name: str, device: str = "cpu") -> None:
+        """Drop one reference to a model and unload it when nobody holds it anymore"""
+        key = (model_name, device)
+        with self._lock:
+            if key not in self._refcounts:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] <= 0:
+                self._models.pop(key, None)
+                self._refcounts.pop(key, None)
+                logger.info(f"Unloaded embedding model {model_name} on {device}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get loaded models and their reference counts"""
+        with self._lock:
+            return {
+                "loaded_models": len(self._models),
+                "references": {
+                    f"{name}@{device}": count
+                    for (name, device), count in self._refcounts.items()
+                }
+            }
+
+
+embedding_model_registry = EmbeddingModelRegistry()
+metrics_registry.register("embedding_models", embedding_model_registry.get_stats)
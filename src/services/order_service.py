@@ -14,8 +14,24 @@ class OrderService:
         logger.info("OrderService initialized")
 
     def _prepare_order_embedding_text(self, order: Dict[str, Any]) -> str:
-        """Prepare text for embedding generation."""
-        return f"{order.get('user_id', '')} {order.get('status', '')} {order.get('total_price', 0.0)} {order.get('discount', '')} {order.get('final_price', '')} {order.get('order_date', '')} {order.get('shipping_address', [])} {order.get('order_details', [])}"
+        """Prepare text for embedding generation.
+
+        The order is flattened the way Chroma stores it first, so a payload
+        and the metadata read back for it produce the same text.
+        """
+        flat = self.chroma_service.flatten_metadata(order)
+        address = flat.get('shipping_address')
+        if address is None:
+            address = " ".join(
+                str(flat[key]) for key in sorted(flat)
+                if key.startswith('shipping_address.') and flat[key] is not None
+            )
+
+        def field(key: str) -> Any:
+            value = flat.get(key)
+            return "" if value is None else value
+
+        return f"{field('user_id')} {field('status')} {field('total_price')} {field('discount')} {field('final_price')} {field('order_date')} {address} {field('order_details')}"
 
     async def create_order(self, order_data: Dict[str, Any]) -> bool:
         """
@@ -70,6 +86,40 @@ class OrderService:
             logger.error(f"Error updating order: {str(e)}")
             return False
 
+    async def update_order_status(self, id: str, status: Any, status_data: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Update the status of an existing order.
+
+        The embedding text is rebuilt from the stored metadata, so the order is
+        only re-embedded when the status actually changed.
+        
+        Args:
+            id: Unique identifier for the order to update
+            status: New order status
+            status_data: Optional extra fields that changed with the status
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            metadata = await self.chroma_service.get_metadata(id)
+            if metadata is None:
+                logger.warning(f"Order with ID {id} does not exist")
+                return False
+
+            metadata.update(status_data or {})
+            metadata['status'] = status
+            await self.chroma_service.update_document(
+                id=id,
+                metadata=metadata,
+                embedding_text=self._prepare_order_embedding_text(metadata)
+            )
+            logger.info(f"Updated status of order {id} to {status}")
+            return True
+        except Exception as e:
+            logger.error(f"Error updating order status: {str(e)}")
+            return False
+
     async def delete_order(self, id: str) -> bool:
         """
         Delete an order from the database.
@@ -91,6 +141,49 @@ class OrderService:
             logger.error(f"Error deleting order: {str(e)}")
             return False
 
+    async def upsert_orders(self, orders: List[Dict[str, Any]]) -> bool:
+        """
+        Create or update many orders in batched writes.
+        
+        Args:
+            orders: Order payloads, each with an 'id'
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            await self.chroma_service.upsert_many([
+                {
+                    'id': order.get('id'),
+                    'metadata': order,
+                    'embedding_text': self._prepare_order_embedding_text(order)
+                }
+                for order in orders if order.get('id')
+            ])
+            logger.info(f"Upserted {len(orders)} orders")
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting orders: {str(e)}")
+            return False
+
+    async def delete_orders(self, ids: List[str]) -> bool:
+        """
+        Delete many orders in batched writes.
+        
+        Args:
+            ids: Unique identifiers of the orders to delete
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            await self.chroma_service.delete_many(ids)
+            logger.info(f"Deleted {len(ids)} orders")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting orders: {str(e)}")
+            return False
+
     def get_order(self, id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve an order from the database.
@@ -15,8 +15,8 @@ class PromotionService:
 
 
     def _prepare_promotion_embedding_text(self, promotion: Dict[str, Any]) -> str:
-        """Prepare text for embedding generation."""
-        return f"{promotion.get('name', '')} {promotion.get('code', '')} {promotion.get('description', '')} {promotion.get('start_date', '') } {promotion.get('end_date', '')} {promotion.get('is_active', '')} {promotion.get('customer_level', '')} {promotion.get('discount_percentage', 0.0)}"    
+        """Prepare text for embedding generation; is_active is filtered on as metadata instead."""
+        return f"{promotion.get('name', '')} {promotion.get('code', '')} {promotion.get('description', '')} {promotion.get('start_date', '') } {promotion.get('end_date', '')} {promotion.get('customer_level', '')} {promotion.get('discount_percentage', 0.0)}"
 
     async def create_promotion(self, promotion_data: Dict[str, Any]):
         """Create a new promotion in ChromaDB."""
@@ -65,17 +65,44 @@ class PromotionService:
             logger.error(f"Error deleting promotion: {e}")
             raise
 
+    async def upsert_promotions(self, promotions: List[Dict[str, Any]]) -> bool:
+        """Create or update many promotions in batched ChromaDB writes."""
+        try:
+            await self.chroma_service.upsert_many([
+                {
+                    'id': promotion.get('id'),
+                    'metadata': promotion,
+                    'embedding_text': self._prepare_promotion_embedding_text(promotion)
+                }
+                for promotion in promotions if promotion.get('id')
+            ])
+            logger.info(f"Upserted {len(promotions)} promotions")
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting promotions: {e}")
+            raise
+
+    async def delete_promotions(self, ids: List[str]) -> None:
+        """Delete many promotions in batched ChromaDB writes."""
+        try:
+            await self.chroma_service.delete_many(ids)
+            logger.info(f"Deleted {len(ids)} promotions")
+        except Exception as e:
+            logger.error(f"Error deleting promotions: {e}")
+            raise
+
     async def search_promotions(
         self,
         query: str,
         n_results: int = 10,
         filters: Dict[str, Any] = None
     ) -> List[Dict[str, Any]]:
-        """Search promotions using ChromaDB vector search."""
+        """Search promotions using ChromaDB vector search, optionally filtered on metadata."""
         try:
-            results = await self.chroma_service.search_items(
+            results = await self.chroma_service.search_filter_items(
                 query=query,
                 n_results=n_results,
+                filters=filters
             )
             
             # Convert results to list of dictionaries
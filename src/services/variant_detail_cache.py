@@ -0,0 +1,162 @@
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+from collections import OrderedDict
+import logging
+import os
+import threading
+import time
+
+from src.monitoring.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class VariantDetailCache:
+    """Bounded LRU cache of serialized variant details keyed by variant id.
+
+    Values are the JSON blobs embedded in layout prompts, so a hit skips both
+    the SQL round trip and re-serialization. Entries expire after a TTL and
+    are invalidated by variant sync events, and by product sync events for
+    every cached variant of the product. Loads record the generation they
+    started at, and put_many drops their results if anything was invalidated
+    meanwhile, so a slow load cannot re-cache stale details.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("VARIANT_DETAIL_CACHE_SIZE", "2000"))
+        ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("VARIANT_DETAIL_CACHE_TTL_SECONDS", "600"))
+        self.ttl_seconds = ttl if ttl > 0 else None
+
+        # variant id -> (blob, expires_at, product id)
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float], Optional[str]]]" = OrderedDict()
+        # product id -> cached variant ids
+        self._variants_by_product: Dict[str, Set[str]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_loads = 0
+
+    @staticmethod
+    def normalize(variant_id: Any) -> str:
+        return str(variant_id).strip().lower()
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every invalidation; pass the value read before a load to put_many"""
+        return self._generation
+
+    def get_many(self, variant_ids: Iterable[Any]) -> Tuple[Dict[str, str], List[str]]:
+        """Split ids into cached blobs and the ids that must be loaded"""
+        found: Dict[str, str] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+        with self._lock:
+            for variant_id in variant_ids:
+                key = self.normalize(variant_id)
+                if key in found or key in missing:
+                    continue
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= now:
+                    self._remove(key)
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.append(key)
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[0]
+                self.hits += 1
+        return found, missing
+
+    def put_many(
+        self,
+        blobs: Dict[str, str],
+        product_ids: Optional[Dict[str, Any]] = None,
+        generation: Optional[int] = None
+    ) -> None:
+        """Store serialized details, evicting the least recently used entries.
+
+        product_ids maps variant ids to their product so product events can
+        invalidate them. Nothing is stored if the cache was invalidated since
+        generation was read.
+        """
+        product_ids = product_ids or {}
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self.stale_loads += 1
+                return
+            for variant_id, blob in blobs.items():
+                key = self.normalize(variant_id)
+                self._remove(key)
+                product_id = product_ids.get(variant_id)
+                product_key = self.normalize(product_id) if product_id is not None else None
+                self._entries[key] = (blob, expires_at, product_key)
+                if product_key is not None:
+                    self._variants_by_product.setdefault(product_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        product_key = entry[2]
+        if product_key is not None:
+            variants = self._variants_by_product.get(product_key)
+            if variants is not None:
+                variants.discard(key)
+                if not variants:
+                    del self._variants_by_product[product_key]
+        return True
+
+    def invalidate_many(self, variant_ids: Iterable[Any]) -> None:
+        """Drop cached details for variants that changed"""
+        with self._lock:
+            self._generation += 1
+            for variant_id in variant_ids:
+                if variant_id is not None and self._remove(self.normalize(variant_id)):
+                    self.invalidations += 1
+
+    def invalidate_products(self, product_ids: Iterable[Any]) -> None:
+        """Drop cached details for every variant of products that changed"""
+        with self._lock:
+            self._generation += 1
+            for product_id in product_ids:
+                if product_id is None:
+                    continue
+                for key in list(self._variants_by_product.get(self.normalize(product_id), ())):
+                    if self._remove(key):
+                        self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._variants_by_product.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "stale_loads": self.stale_loads,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+variant_detail_cache = VariantDetailCache()
+metrics_registry.register("variant_detail_cache", variant_detail_cache.get_stats)
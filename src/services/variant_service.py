@@ -14,8 +14,8 @@ class VariantService:
         logger.info("VariantService initialized")
 
     def _prepare_variant_embedding_text(self, variant: Dict[str, Any]) -> str:
-        """Prepare text for embedding generation."""
-        return f"{variant.get('name', '')} {variant.get('sku', '')} {variant.get('price', '')} {variant.get('stock_quantity', '')} {variant.get('attributes', '')}"
+        """Prepare text for embedding generation; stock is metadata only so stock updates skip re-embedding."""
+        return f"{variant.get('name', '')} {variant.get('sku', '')} {variant.get('price', '')} {variant.get('attributes', '')}"
 
     async def create_variant(self, variant_data: Dict[str, Any]) -> bool:
         try:
@@ -81,6 +81,49 @@ class VariantService:
             logger.error(f"Error deleting variant: {str(e)}")
             return False
 
+    async def upsert_variants(self, variants: List[Dict[str, Any]]) -> bool:
+        """
+        Create or update many variants in batched writes.
+        
+        Args:
+            variants: Variant payloads, each with an 'id'
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            await self.chroma_service.upsert_many([
+                {
+                    'id': variant.get('id'),
+                    'metadata': variant,
+                    'embedding_text': self._prepare_variant_embedding_text(variant)
+                }
+                for variant in variants if variant.get('id')
+            ])
+            logger.info(f"Upserted {len(variants)} variants")
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting variants: {str(e)}")
+            return False
+
+    async def delete_variants(self, ids: List[str]) -> bool:
+        """
+        Delete many variants in batched writes.
+        
+        Args:
+            ids: Unique identifiers of the variants to delete
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            await self.chroma_service.delete_many(ids)
+            logger.info(f"Deleted {len(ids)} variants")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting variants: {str(e)}")
+            return False
+
     def get_variant(self, id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a variant from the database.
@@ -3,11 +3,12 @@ import uuid
 import json
 import os
 from datetime import datetime
-import decimal
 import re
-from google import genai
 from google.genai import types
 
+from src.api.gemini_client import gemini_client
+from src.querries.variant_querries import VariantQueries
+
 # Type definitions
 class FurniturePlacement(TypedDict):
     furniture_id: str
@@ -71,36 +72,9 @@ DO NOT include any text outside of this JSON structure. Ensure the JSON is valid
 
 class VirtualRoomService:
     def __init__(self):
-        """Initialize the VirtualRoomService with Gemini AI configuration."""
-        self.config = {
-            "automatic_function_calling": {"disable": True},
-            "tool_config": {"function_calling_config": {"mode": "any"}},
-        }
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-        self.chat = self.client.chats.create(
-            model="gemini-2.0-flash",
-            config=self.config,
-        )
-
-    @staticmethod
-    def _serialize_json(obj: Any) -> Any:
-        """Convert special types to JSON-serializable formats."""
-        if isinstance(obj, uuid.UUID):
-            return str(obj)
-        if isinstance(obj, decimal.Decimal):
-            return float(obj)
-        raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
-
-    @staticmethod
-    def _convert_uuids(obj: Any) -> Any:
-        """Recursively convert UUIDs to strings in nested structures."""
-        if isinstance(obj, dict):
-            return {k: VirtualRoomService._convert_uuids(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [VirtualRoomService._convert_uuids(item) for item in obj]
-        elif isinstance(obj, uuid.UUID):
-            return str(obj)
-        return obj
+        """Initialize the VirtualRoomService with the shared async Gemini client."""
+        self.client = gemini_client
+        self.variant_queries = VariantQueries()
 
     def _parse_ai_response(self, response: str) -> Dict[str, Any]:
         """Parse and validate AI response text into JSON format."""
@@ -123,27 +97,23 @@ class VirtualRoomService:
 
     async def get_variants_with_details(self, variant_ids: List[uuid.UUID]) -> Dict[str, Any]:
         """
-        Fetch variant details from the database and convert UUIDs to strings.
+        Fetch serialized variant details, served from cache where possible.
         
         Args:
             variant_ids: List of UUID objects representing variant IDs
             
         Returns:
-            Dictionary containing success status and variant details
+            Dictionary containing success status and one JSON string per variant
         """
-        variant_queries = VariantQueries()
         str_variant_ids = [str(vid) for vid in variant_ids]
-        variants_details = variant_queries.get_variants_with_details(ids=str_variant_ids)
+        variants_details = await self.variant_queries.get_variant_details_json(ids=str_variant_ids)
 
         if not variants_details.get("success"):
             return {"error": variants_details.get("error", "Failed to fetch variant details")}
 
-        variants = variants_details.get("result", [])
-        converted_variants = self._convert_uuids(variants)
-
         return {
             "success": True,
-            "variants": converted_variants
+            "variants": variants_details.get("result", [])
         }
 
     async def _create_detailed_prompt(
@@ -215,12 +185,12 @@ Room Information:
             )
         return desc
 
-    def _format_furniture_desc(self, variants: List[Dict[str, Any]]) -> str:
-        """Format furniture information into a readable string."""
-        desc = "Furniture Items:\n"
-        for i, furniture in enumerate(variants, 1):
-            desc += f"- Furniture {i}:\n```json\n{json.dumps(furniture, indent=2, default=self._serialize_json)}\n```\n"
-        return desc
+    @staticmethod
+    def _format_furniture_desc(variants: List[str]) -> str:
+        """Format pre-serialized furniture details into a readable string."""
+        return "Furniture Items:\n" + "".join(
+            f"- Furniture {i}:\n```json\n{furniture}\n```\n" for i, furniture in enumerate(variants, 1)
+        )
 
     @staticmethod
     def _format_options_desc(options: Dict[str, Any]) -> str:
@@ -273,7 +243,7 @@ Room Information:
         )
 
         try:
-            response = self.client.models.generate_content(
+            response = await self.client.generate_content(
                 model="gemini-2.0-flash",
                 contents=contents,
                 config=generation_config,